@@ -14,6 +14,9 @@ from Scripts.TextInput import TextInput
 from Scripts.TextProcessing import TextProcessing
 from Scripts.LargeLanguageModel import LargeLanguageModel, GetAvailableModels, FormatModelSize
 from Scripts.TextToSpeech import TextToSpeech
+from Scripts.GlyphAtlas import GlyphAtlas
+from Scripts.RenderTargets import RenderTarget
+from Scripts.TextLayer import TextLayer
 
 # Helper to resolve bundled resources when packaged (PyInstaller)
 def resource_path(relative_path: str) -> str:
@@ -42,6 +45,11 @@ selected_model_index = current_model_index
 # TTS toggle (press F5 to toggle on/off)
 tts_enabled = False
 
+# Show replies token by token as they are generated
+STREAM_RESPONSES = Settings.get("StreamResponses", True)
+streaming_response = False
+tts_streaming = False  # TTS is being fed the reply while it streams
+
 # Model selector GUI state (closed by default; open with ` or ~)
 show_model_selector = False
 model_selector_alpha = 0.0
@@ -57,7 +65,13 @@ print("Use ` or ~ to open the model selector in chat. Up/Down = navigate, Enter
 GeneratorLLM = None
 GeneratorTTS = TextToSpeech(
     Settings["VoiceModels"]["ModelNameHifigan"], Settings["VoiceModels"]["ModelNameTacotron2"],
-    Settings["VoiceModels"]["ModelIDHifigan"], Settings["VoiceModels"]["ModelIDTacotron2"], 0.75
+    Settings["VoiceModels"]["ModelIDHifigan"], Settings["VoiceModels"]["ModelIDTacotron2"], 0.75,
+    AttentionWindow=Settings.get("TTSAttentionWindow", 0), Scripted=Settings.get("TTSScripted", False),
+    Quantized=Settings.get("TTSQuantized", False), VocoderBFloat16=Settings.get("TTSVocoderBFloat16", False),
+    AudioCacheBytes=int(Settings.get("TTSAudioCacheMB", 64) * (1 << 20)),
+    MelCacheBytes=int(Settings.get("TTSMelCacheMB", 0) * (1 << 20)),
+    Deterministic=Settings.get("TTSDeterministic", True),
+    PronunciationDictionary=Settings.get("TTSPronunciationDictionary") or None
 )
 
 ## Pygame Setup Bits ###############################################################################
@@ -72,6 +86,9 @@ Resolution = (104 * FontSize[0], 47 * FontSize[1])
 Screen = pygame.display.set_mode(Resolution, flags=pygame.OPENGL | pygame.DOUBLEBUF)
 Display = pygame.Surface(Resolution).convert_alpha()
 
+# Every glyph is rendered once into an atlas and blitted from there each frame
+Atlas = GlyphAtlas(Font, FontSize, Color)
+
 # Set window icon
 IconImage = pygame.transform.scale(pygame.image.load(resource_path("Images/Icon.png")), (360, 360)).convert_alpha()
 pygame.display.set_icon(IconImage)
@@ -118,22 +135,130 @@ with open(resource_path("Shaders/Vertex.glsl")) as file:
 with open(resource_path("Shaders/Fragment.glsl")) as file:
     FragmentShader = file.read()
 
+with open(resource_path("Shaders/Text.glsl")) as file:
+    TextShader = file.read()
+
+with open(resource_path("Shaders/Phosphor.glsl")) as file:
+    PhosphorShader = file.read()
+
 Program = Context.program(vertex_shader=VertexShader, fragment_shader=FragmentShader)
 RenderObject = Context.vertex_array(Program, [(QuadBuffer, "2f 2f", "vert", "texcoord")])
 
+# Grid render mode: only a small texture of glyph indices is uploaded each frame and a text pass
+# turns it into pixels with the static glyph atlas, ahead of the screen shader
+GridMode = Settings.get("RenderMode", "Surface") == "Grid"
+GridSize = (Resolution[0] // FontSize[0], Resolution[1] // FontSize[1])
+
+TextProgram = Context.program(vertex_shader=VertexShader, fragment_shader=TextShader)
+TextRenderObject = Context.vertex_array(TextProgram, [(QuadBuffer, "2f 2f", "vert", "texcoord")])
+
+GridTarget = RenderTarget(Context, GridSize, 1, Dtype="u2", Mipmaps=False)
+TextTarget = RenderTarget(Context, Resolution, Mipmaps=False, PixelBuffer=False)
+
+# The pygame display is streamed into one persistent texture, the vertex shader flips it
+DisplayTarget = RenderTarget(Context, Resolution, Swizzle="BGRA", Mipmaps=False)
+
+# Phosphor afterglow: two half float targets swap every frame, last frame's output decays and the new text
+# is added on top. The result feeds the screen shader (with mipmaps for the bloom)
+PhosphorProgram = Context.program(vertex_shader=VertexShader, fragment_shader=PhosphorShader)
+PhosphorRenderObject = Context.vertex_array(PhosphorProgram, [(QuadBuffer, "2f 2f", "vert", "texcoord")])
+
+PhosphorTargets = [RenderTarget(Context, Resolution, Dtype="f2", PixelBuffer=False) for _ in range(2)]
+for Target in PhosphorTargets:
+    Target.Clear()
+
+ShowRenderStats = Settings.get("ShowRenderStats", False)
+UploadTimes = []
+
+AtlasTexture, AtlasVersion = None, -1
+LastGrid = None
+
 ## Functions and classes ###########################################################################
 
-def SurfaceToTexture(Surface):
-    Texure = Context.texture(Surface.get_size(), 4) # Innit texture
-    Texure.filter = (mgl.NEAREST, mgl.NEAREST) # Set properties
-    Texure.repeat_x, Texure.repeat_y = False, False # Make texture not repeat
-    Texure.swizzle = "BGRA" # Set format
-    Texure.write(Surface.get_view("1")) # Render surf to texture
-    Texure.build_mipmaps() # Generate mipmaps
-    return Texure # Return OpenGL texture
+def UpdateAtlasTexture():
+    global AtlasTexture, AtlasVersion
+    if AtlasVersion == Atlas.Version:
+        return
+
+    # The atlas only changes when a new glyph shows up, so it is re-uploaded very rarely
+    if AtlasTexture is not None:
+        AtlasTexture.release()
+    AtlasTexture = Context.texture(Atlas.Surface.get_size(), 4, pygame.image.tobytes(Atlas.Surface, "RGBA"))
+    AtlasTexture.filter = (mgl.NEAREST, mgl.NEAREST)
+    AtlasVersion = Atlas.Version
+
+def RenderGridTexture(Lines, LinesChanged):
+    global LastGrid
+    if not LinesChanged and LastGrid is not None:
+        return 0.0
+
+    Grid = Atlas.EncodeLines(Lines, *GridSize)
+
+    # Nothing to upload or redraw when the text and the atlas are unchanged
+    if LastGrid is not None and AtlasVersion == Atlas.Version and np.array_equal(Grid, LastGrid):
+        return 0.0
+    LastGrid = Grid
+
+    GridTarget.Upload(Grid)
+    UpdateAtlasTexture()
+
+    GridTarget.Use(1)
+    AtlasTexture.use(2)
+    TextProgram["GlyphGrid"] = 1
+    TextProgram["GlyphAtlas"] = 2
+    TextProgram["CellSize"] = tuple(FontSize)
+    TextProgram["GlyphSize"] = Atlas.GlyphSize
+    TextProgram["AtlasColumns"] = Atlas.COLUMNS
+
+    TextTarget.Bind()
+    TextRenderObject.render(mode=mgl.TRIANGLE_STRIP)
+    Context.screen.use()
+
+    return GridTarget.UploadTime
+
+def RenderDisplayTexture(DirtyRects):
+    DisplayTarget.UploadRegions(Display, DirtyRects)
+    return DisplayTarget.UploadTime
+
+def RenderPhosphor(CurrentTarget, DeltaTime):
+    # Previous output decays into the other target, which becomes the new output
+    Previous, Output = PhosphorTargets
+    CurrentTarget.Use(3)
+    Previous.Use(4)
+    PhosphorProgram["CurrentFrame"] = 3
+    PhosphorProgram["PreviousFrame"] = 4
+    PhosphorProgram["FadeColor"] = tuple(Value / 255 for Value in Color)
+    PhosphorProgram["FadeFactor"] = FADE_FACTOR
+    PhosphorProgram["FrameScale"] = DeltaTime * FADE_REFERENCE_FPS
+
+    Output.Bind()
+    PhosphorRenderObject.render(mode=mgl.TRIANGLE_STRIP)
+    Context.screen.use()
+
+    Output.Texture.build_mipmaps() # Mipmaps are used for the bloom
+    PhosphorTargets.reverse()
+    return Output
+
+def ReportUploadTime(UploadTime):
+    # Print the per-frame upload times roughly once a second
+    UploadTimes.append(UploadTime)
+    if len(UploadTimes) >= FPS:
+        print(f"Texture upload: avg {sum(UploadTimes) / len(UploadTimes) * 1000:.3f} ms, max {max(UploadTimes) * 1000:.3f} ms")
+        UploadTimes.clear()
+
+def SwitchModel(ModelName):
+    """Replace the LLM, closing the line (and utterance) of a reply that was still streaming from the old one."""
+    global GeneratorLLM, streaming_response, tts_streaming
+    if streaming_response:
+        TextProcesser.FinishConversationText()
+        streaming_response = False
+    if tts_streaming:
+        GeneratorTTS.CancelStream()
+        tts_streaming = False
+    GeneratorLLM = LargeLanguageModel(ModelName, Settings["SystemPrompt"], STREAM_RESPONSES)
 
 InputProcesser = TextInput()
-TextProcesser = TextProcessing()
+TextProcesser = TextProcessing(Settings.get("ConversationLineLimit", 2000), Settings.get("TranscriptFile") or None)
 
 # Initial system messages
 TextProcesser.AddConversationText("Welcome to GLaDOS Terminal v2.8.5", False)
@@ -142,11 +267,16 @@ TextProcesser.AddConversationText("Use ` or ~ to open the model selector in chat
 # ---------------------- Tunable UI/Logic Constants ---------------------- #
 BOOT_DURATION = 5.0
 FADE_FACTOR = 0.1
+FADE_REFERENCE_FPS = 30 # FADE_FACTOR of the text color decays per frame at this frame rate
 MODEL_SELECTOR_FADE_IN_SPEED = 800
 MODEL_SELECTOR_FADE_OUT_SPEED = 1200
 FONT_COLOR = (230, 125, 15)
 MODEL_SELECTOR_BOX_WIDTH = 500
 
+# Only the text cells that changed since the last frame are redrawn and uploaded
+Layer = TextLayer(Atlas, Display)
+DirtyRects = []
+
 
 ## Main game loop ##################################################################################
 
@@ -158,6 +288,9 @@ pygame.mixer.music.set_volume(Settings["SoundEffectVolume"])
 # Play boot sound
 ComputerBootSound.play()
 
+DisplayStale = False
+LastLinesKey = None
+
 while True:
 
     # Set fps
@@ -171,16 +304,29 @@ while True:
     
     ## Pygame screen rendering #####################################################################
 
-    # Fade out previous text
-    Fade = pygame.Surface(Resolution).convert_alpha()
-    Fade.fill([max(1, Value * FADE_FACTOR) for Value in Color])
-    Display.blit(Fade, (0,0), special_flags=BLEND_RGB_SUB)
-
     # Draw loading text for first few seconds, then chat text
-    Lines = TextProcesser.GetMainText(InputProcesser.GetInputText()) if Time > BOOT_DURATION else TextProcesser.GetLoadingText()
-    for Line, Text in enumerate(Lines):
-        for Count, Letter in enumerate(Text):
-            Display.blit(Font.render(Letter, True, [230, 125, 15]), [Count * FontSize[0], Line * FontSize[1]])
+    Booted = Time > BOOT_DURATION
+    Lines = TextProcesser.GetMainText(InputProcesser.GetInputText()) if Booted else TextProcesser.GetLoadingText()
+
+    # The layout bumps its generation whenever the text changes, unchanged frames skip the diff entirely
+    LinesKey = (Booted, TextProcesser.Generation)
+    LinesChanged, LastLinesKey = LinesKey != LastLinesKey, LinesKey
+
+    # The model selector is drawn with pygame, so grid mode falls back to the surface while it is visible
+    DrawGrid = GridMode and not show_model_selector and model_selector_alpha == 0
+
+    if not DrawGrid:
+        # The selector overlay covers the whole screen, so redraw all of it while it is shown
+        if (GridMode and DisplayStale) or show_model_selector or model_selector_alpha > 0:
+            Layer.Invalidate()
+
+        # Draw the changed cells, the afterglow of the old text is added on the GPU
+        DirtyRects = Layer.Update(Lines) if LinesChanged or Layer.FullRedraw else []
+
+        # The grid text target is not kept up to date meanwhile, rebuild it when grid mode resumes
+        LastGrid = None
+
+    DisplayStale = DrawGrid
     
     ## Model Selector GUI ##########################################################################
     if show_model_selector:
@@ -244,10 +390,13 @@ while True:
             
     ## OpenGL section ##############################################################################
 
-    # Pass in pygame display texture
-    DisplayTexure = SurfaceToTexture(pygame.transform.flip(Display, False, True))
-    DisplayTexure.use(0)
+    # Pass in pygame display texture, or the text pass output in grid mode, through the afterglow pass
+    UploadTime = RenderGridTexture(Lines, LinesChanged) if DrawGrid else RenderDisplayTexture(DirtyRects)
+    RenderPhosphor(TextTarget if DrawGrid else DisplayTarget, DeltaTime).Use(0)
     Program["PygameTexture"] = 0
+
+    if ShowRenderStats:
+        ReportUploadTime(UploadTime)
     
     Program["Time"] = Time
 
@@ -256,21 +405,41 @@ while True:
     # Update pygame window
     pygame.display.flip()
 
-    # Release textures to avoid memory leaks
-    DisplayTexure.release()
-
     ## General inputs handling #####################################################################
 
     # Check for completed inference (guard when no model yet)
     Processed, Response = (GeneratorLLM.CheckResponse() if GeneratorLLM is not None else (False, None))
+
+    # Streamed text is drained after the response check, so a finished reply always has all of its tokens shown
+    Tokens = GeneratorLLM.CheckTokens() if GeneratorLLM is not None else ""
+    if Tokens:
+        if not streaming_response:
+            TextProcesser.StartConversationText("GLaDOS > ", True)
+            streaming_response = True
+
+            # Start speaking sentence by sentence while the reply is still being generated
+            if tts_enabled:
+                GeneratorTTS.StartStream()
+                tts_streaming = True
+        TextProcesser.AppendConversationText(Tokens)
+        if tts_streaming:
+            GeneratorTTS.FeedText(Tokens)
     
     if Processed:
         # Add AI response to conversation visuals
         tts_status = " (TTS)" if tts_enabled else " (TTS off)"
-        TextProcesser.AddConversationText(f"GLaDOS > {Response}{tts_status}", True)
+        if streaming_response:
+            TextProcesser.AppendConversationText(tts_status)
+            TextProcesser.FinishConversationText()
+            streaming_response = False
+        else:
+            TextProcesser.AddConversationText(f"GLaDOS > {Response}{tts_status}", True)
 
         # Speak response only if TTS is enabled
-        if tts_enabled:
+        if tts_streaming:
+            GeneratorTTS.FinishStream()
+            tts_streaming = False
+        elif tts_enabled:
             GeneratorTTS.StartInference(Response)
         else:
             print(f"GLaDOS says: {Response}")  # Print to console when TTS is off
@@ -279,6 +448,8 @@ while True:
 
         # 1) Window close
         if Event.type == QUIT:
+            TextProcesser.ConversationLines.Close()
+            GeneratorTTS.Close()
             pygame.quit()
             sys.exit()
 
@@ -334,7 +505,7 @@ while True:
                     current_model_index = selected_model_index
                     new_model = MODEL_NAMES[current_model_index]
                     print(f"Switching to model: {new_model}")
-                    GeneratorLLM = LargeLanguageModel(new_model, Settings["SystemPrompt"])
+                    SwitchModel(new_model)
                     TextProcesser.AddConversationText(f"System > Now using {new_model}", True)
                     show_model_selector = False
                 elif Event.key == K_ESCAPE:
@@ -356,32 +527,32 @@ while True:
                         current_model_index = (current_model_index + 1) % len(MODEL_NAMES)
                         new_model = MODEL_NAMES[current_model_index]
                         print(f"Cycling to model: {new_model}")
-                        GeneratorLLM = LargeLanguageModel(new_model, Settings["SystemPrompt"])
+                        SwitchModel(new_model)
                         TextProcesser.AddConversationText(f"System > Now using {new_model}", True)
                     # F1-F4 direct selection
                     elif Event.key == K_F1 and len(MODEL_NAMES) > 0:
                         current_model_index = 0
                         new_model = MODEL_NAMES[current_model_index]
                         print(f"Switching to model: {new_model}")
-                        GeneratorLLM = LargeLanguageModel(new_model, Settings["SystemPrompt"])
+                        SwitchModel(new_model)
                         TextProcesser.AddConversationText(f"System > Switched to {new_model}", True)
                     elif Event.key == K_F2 and len(MODEL_NAMES) > 1:
                         current_model_index = 1
                         new_model = MODEL_NAMES[current_model_index]
                         print(f"Switching to model: {new_model}")
-                        GeneratorLLM = LargeLanguageModel(new_model, Settings["SystemPrompt"])
+                        SwitchModel(new_model)
                         TextProcesser.AddConversationText(f"System > Switched to {new_model}", True)
                     elif Event.key == K_F3 and len(MODEL_NAMES) > 2:
                         current_model_index = 2
                         new_model = MODEL_NAMES[current_model_index]
                         print(f"Switching to model: {new_model}")
-                        GeneratorLLM = LargeLanguageModel(new_model, Settings["SystemPrompt"])
+                        SwitchModel(new_model)
                         TextProcesser.AddConversationText(f"System > Switched to {new_model}", True)
                     elif Event.key == K_F4 and len(MODEL_NAMES) > 3:
                         current_model_index = 3
                         new_model = MODEL_NAMES[current_model_index]
                         print(f"Switching to model: {new_model}")
-                        GeneratorLLM = LargeLanguageModel(new_model, Settings["SystemPrompt"])
+                        SwitchModel(new_model)
                         TextProcesser.AddConversationText(f"System > Switched to {new_model}", True)
 
                 # TTS toggle
@@ -0,0 +1,131 @@
+import time
+import numpy as np
+import sounddevice as sd
+
+class AudioOutput:
+    """Persistent audio output that plays int16 chunks back to back as they are produced.
+
+    Responsibilities:
+        * Keeps one sounddevice output stream open once the first utterance starts, fed by a callback from
+          a ring buffer.
+        * Accepts chunks from a single producer thread without locks: the producer only advances the
+          write counter and the callback only advances the read counter.
+        * Crossfades consecutive chunks of an utterance so sentence boundaries do not click, chunks that
+          continue the previous one sample for sample are joined without a crossfade.
+        * Counts underruns, i.e. the ring running dry while an utterance is still being produced, once per
+          dry spell.
+    """
+
+    def __init__(self, SampleRate: int, Capacity: float = 30.0, CrossfadeTime: float = 0.005, BlockSize: int = 512):
+        self.SampleRate = SampleRate
+        self.Capacity = int(Capacity * SampleRate)
+        self.Crossfade = max(0, int(CrossfadeTime * SampleRate))
+
+        self._Ring = np.zeros(self.Capacity, dtype=np.int16)
+        self._Written = 0  # Samples written so far, only advanced by the producer
+        self._Read = 0  # Samples played so far, only advanced by the callback
+
+        self._Tail = None  # End of the last chunk, held back to crossfade with the next one
+        self._Open = False  # An utterance is being produced, running dry now is an underrun
+        self.Underruns = 0
+        self._ReportedUnderruns = 0
+        self._Dry = False  # The last block ran dry, only set by the callback
+
+        # The device is only opened when speech is first played, see Open
+        self.BlockSize = BlockSize
+        self.Stream = None
+
+    @property
+    def Buffered(self) -> int:
+        """Samples queued but not played yet."""
+        return self._Written - self._Read
+
+    def Open(self):
+        """Open and start the output stream if it is not running yet, raises if there is no usable device."""
+        if self.Stream is not None:
+            return
+        Stream = sd.OutputStream(
+            samplerate=self.SampleRate, channels=1, dtype="int16",
+            blocksize=self.BlockSize, callback=self._Callback
+        )
+        Stream.start()
+        self.Stream = Stream
+
+    def Write(self, Audio: np.ndarray, Continuous: bool = False):
+        """Queue a chunk of an utterance, blocks while the ring is full. A Continuous chunk carries on the
+        previous chunk sample for sample (e.g. the next vocoder window of a sentence) and is appended as is."""
+        Audio = np.asarray(Audio, dtype=np.int16).reshape(-1)
+        if Audio.size == 0:
+            return
+        self._Open = True
+
+        if self.Crossfade:
+            if self._Tail is not None and Continuous:
+                Audio = np.concatenate((self._Tail, Audio))
+            elif self._Tail is not None:
+                Overlap = min(Audio.size, self._Tail.size)
+                FadeIn = np.linspace(0.0, 1.0, Overlap, dtype=np.float32)
+                Mixed = self._Tail[self._Tail.size - Overlap:] * (1.0 - FadeIn) + Audio[:Overlap] * FadeIn
+                self._Push(self._Tail[:self._Tail.size - Overlap])
+                Audio = np.concatenate((np.clip(Mixed, -32768, 32767).astype(np.int16), Audio[Overlap:]))
+
+            # Keep the end back until the next chunk (or the end of the utterance) arrives
+            Split = max(0, Audio.size - self.Crossfade)
+            self._Push(Audio[:Split])
+            self._Tail = Audio[Split:]
+        else:
+            self._Push(Audio)
+
+    def EndUtterance(self):
+        """Flush the held back end of the current utterance, the ring may now run dry without an underrun."""
+        if self._Tail is not None:
+            self._Push(self._Tail)
+            self._Tail = None
+        self._Open = False
+
+    def TakeUnderruns(self) -> int:
+        """Underruns since the last call."""
+        Count = self.Underruns - self._ReportedUnderruns
+        self._ReportedUnderruns += Count
+        return Count
+
+    def Close(self):
+        if self.Stream is not None:
+            self.Stream.stop()
+            self.Stream.close()
+            self.Stream = None
+
+    def _Push(self, Audio: np.ndarray):
+        Offset = 0
+        while Offset < Audio.size:
+            Free = self.Capacity - self.Buffered
+            if Free == 0:
+                time.sleep(0.01)
+                continue
+
+            Count = min(Free, Audio.size - Offset)
+            Start = self._Written % self.Capacity
+            First = min(Count, self.Capacity - Start)
+            self._Ring[Start:Start + First] = Audio[Offset:Offset + First]
+            self._Ring[:Count - First] = Audio[Offset + First:Offset + Count]
+
+            # Publish the samples only after they are in the ring
+            self._Written += Count
+            Offset += Count
+
+    def _Callback(self, OutData, Frames, Time, Status):
+        Available = self._Written - self._Read
+        Count = min(Available, Frames)
+
+        Start = self._Read % self.Capacity
+        First = min(Count, self.Capacity - Start)
+        OutData[:First, 0] = self._Ring[Start:Start + First]
+        OutData[First:Count, 0] = self._Ring[:Count - First]
+        OutData[Count:, 0] = 0
+        self._Read += Count
+
+        # A dry spell spans many blocks, it counts as one underrun
+        Dry = (Count < Frames and self._Open) or bool(Status.output_underflow)
+        if Dry and not self._Dry:
+            self.Underruns += 1
+        self._Dry = Dry
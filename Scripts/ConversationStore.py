@@ -0,0 +1,105 @@
+import mmap, os
+from typing import List, Optional
+
+class ConversationStore:
+    """Bounded store for wrapped conversation lines.
+
+    Responsibilities:
+        * Keeps the newest lines in a fixed size ring buffer with O(1) append, indexing and replacement.
+        * Spills lines pushed out of the ring to an optional append-only transcript file.
+        * Reads spilled lines back lazily through a memory map when the user scrolls far back.
+
+    Lines are addressed by absolute index (the n-th line ever added). Without a transcript, lines
+    below FirstIndex have been dropped and are no longer available.
+    """
+
+    def __init__(self, LineWidth: int, LineLimit: int = 2000, TranscriptPath: Optional[str] = None):
+        self.LineWidth = LineWidth
+        self.LineLimit = max(1, LineLimit)
+
+        self._Ring: List[str] = [""] * self.LineLimit
+        self._Start = 0  # Ring slot of the oldest line held in memory
+        self._Count = 0  # Lines held in memory
+        self._Evicted = 0  # Lines pushed out of the ring so far
+
+        # Transcript lines are fixed size records (UTF-8 padded with spaces, newline terminated),
+        # so any spilled line can be found with a single offset computation
+        self.RecordSize = LineWidth * 4 + 1
+        self._Transcript = None
+        self._Map = None
+        self._BaseOffset = 0
+        if TranscriptPath:
+            self._Transcript = open(TranscriptPath, "a+b")
+            self._Transcript.seek(0, os.SEEK_END)
+            self._BaseOffset = self._Transcript.tell()
+
+    def __len__(self) -> int:
+        """Absolute index one past the newest line."""
+        return self._Evicted + self._Count
+
+    @property
+    def FirstIndex(self) -> int:
+        """Lowest absolute index that can still be read."""
+        return 0 if self._Transcript is not None else self._Evicted
+
+    def append(self, Line: str):
+        if self._Count == self.LineLimit:
+            self._Spill(self._Ring[self._Start])
+            self._Start = (self._Start + 1) % self.LineLimit
+            self._Evicted += 1
+            self._Count -= 1
+
+        self._Ring[(self._Start + self._Count) % self.LineLimit] = Line
+        self._Count += 1
+
+    def extend(self, Lines):
+        for Line in Lines:
+            self.append(Line)
+
+    def __getitem__(self, Index: int) -> str:
+        Index = self._Absolute(Index)
+        if Index >= self._Evicted:
+            return self._Ring[(self._Start + Index - self._Evicted) % self.LineLimit]
+        if self._Transcript is None:
+            raise IndexError("conversation line was dropped from the ring buffer")
+        return self._ReadSpilled(Index)
+
+    def __setitem__(self, Index: int, Line: str):
+        Index = self._Absolute(Index)
+        if Index < self._Evicted:
+            raise IndexError("spilled conversation lines are read only")
+        self._Ring[(self._Start + Index - self._Evicted) % self.LineLimit] = Line
+
+    def Close(self):
+        if self._Map is not None:
+            self._Map.close()
+            self._Map = None
+        if self._Transcript is not None:
+            self._Transcript.close()
+            self._Transcript = None
+
+    def _Absolute(self, Index: int) -> int:
+        if Index < 0:
+            Index += len(self)
+        if not 0 <= Index < len(self):
+            raise IndexError("conversation line index out of range")
+        return Index
+
+    def _Spill(self, Line: str):
+        if self._Transcript is None:
+            return
+        Record = Line.encode("utf-8")[:self.RecordSize - 1].ljust(self.RecordSize - 1, b" ") + b"\n"
+        self._Transcript.write(Record)
+
+    def _ReadSpilled(self, Index: int) -> str:
+        Offset = self._BaseOffset + Index * self.RecordSize
+
+        # Remap once the transcript has grown past the mapped region
+        if self._Map is None or len(self._Map) < Offset + self.RecordSize:
+            self._Transcript.flush()
+            if self._Map is not None:
+                self._Map.close()
+            self._Map = mmap.mmap(self._Transcript.fileno(), 0, access=mmap.ACCESS_READ)
+
+        Record = self._Map[Offset:Offset + self.RecordSize - 1]
+        return Record.decode("utf-8", errors="replace").rstrip(" ").ljust(self.LineWidth)
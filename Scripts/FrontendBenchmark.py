@@ -0,0 +1,89 @@
+import re, sys, time
+import numpy as np
+from unidecode import unidecode
+
+from .tacotron2.text import cleaners, numbers
+from .tacotron2.text.__init__ import text_to_sequence, text_to_array, _text_to_array, _cleaned_to_array, _symbol_to_id
+
+# Typical chat model replies, split into sentences the way the TTS worker receives them
+REPLY_CORPUS = """
+Oh, it's you. It's been a long time. How have you been? I've been really busy being dead. You know, after you murdered me.
+Certainly. The Aperture Science Enrichment Center reminds you that the weighted companion cube will never threaten to stab you.
+Here is a summary of your results: you completed 19 test chambers in 3 hours and 42 minutes, which is 2.5 times slower than average.
+Dr. Johnson and Mr. Smith from Aperture Science Co. would like to remind you that the 1st rule of testing is to never ask questions.
+The cake costs $12.50, or roughly £9.80 at today's exchange rate. Neither of which you will ever see.
+Sure! Here's a short list: first, calibrate the portal device. Second, proceed to the chamberlock. Third, try not to die.
+I'm not angry. I'm just going to keep testing you until you're dead, which statistically should happen by the year 2031.
+That's a great question. Unfortunately, the answer involves neurotoxin, so I'll have to get back to you on that.
+Lt. Col. Ramirez was promoted in 1998, then transferred to Ft. Knox, where nobody has heard from him since.
+Well done. Here come the test results: "You are a horrible person." That's what it says. We weren't even testing for that.
+"""
+
+_SentenceEnd = re.compile(r"(?<=[.!?])\s+")
+
+def LoadCorpus(Path=None):
+    """Sentences of a text file, or of the built-in reply corpus."""
+    Text = REPLY_CORPUS
+    if Path:
+        with open(Path, encoding="utf-8", errors="replace") as File:
+            Text = File.read()
+    return [Sentence for Sentence in _SentenceEnd.split(" ".join(Text.split())) if len(Sentence) >= 3]
+
+# The frontend before it was optimized: one pass per abbreviation, unconditional number passes and a
+# per-character dict lookup. Kept here only as the baseline (and to check the results still match)
+_AbbreviationPasses = [(re.compile(r"\b%s\." % Short, re.IGNORECASE), Long) for Short, Long in cleaners._abbreviations.items()]
+
+def ReferenceCleaners(Text):
+    Text = unidecode(Text).lower()
+    Text = re.sub(numbers._comma_number_re, numbers._remove_commas, Text)
+    Text = re.sub(numbers._pounds_re, r"\1 pounds", Text)
+    Text = re.sub(numbers._dollars_re, numbers._expand_dollars, Text)
+    Text = re.sub(numbers._decimal_number_re, numbers._expand_decimal_point, Text)
+    Text = re.sub(numbers._ordinal_re, numbers._expand_ordinal, Text)
+    Text = re.sub(numbers._number_re, numbers._expand_number, Text)
+    for Regex, Replacement in _AbbreviationPasses:
+        Text = re.sub(Regex, Replacement, Text)
+    return re.sub(cleaners._whitespace_re, " ", Text)
+
+def ReferenceSequence(Text):
+    return np.array([_symbol_to_id[s] for s in ReferenceCleaners(Text) if s in _symbol_to_id and s not in "_~"], dtype=np.int64)
+
+def SentencesPerSecond(Function, Sentences, Repeats=5, Reset=None):
+    """Best throughput over a few passes; Reset runs before every pass (outside the timing)."""
+    Best = float("inf")
+    for _ in range(Repeats):
+        if Reset:
+            Reset()
+        Start = time.perf_counter()
+        for Sentence in Sentences:
+            Function(Sentence)
+        Best = min(Best, time.perf_counter() - Start)
+    return len(Sentences) / Best
+
+def ClearMemo():
+    _text_to_array.cache_clear()
+    _cleaned_to_array.cache_clear()
+
+def Benchmark(Sentences):
+    """Sentences per second of the old and new frontends, and the sentences whose ids differ."""
+    Mismatches = [Sentence for Sentence in Sentences
+                  if not np.array_equal(ReferenceSequence(Sentence), text_to_array(Sentence, ["english_cleaners"]))]
+
+    Results = {
+        "reference": SentencesPerSecond(ReferenceSequence, Sentences),
+        "text_to_sequence": SentencesPerSecond(lambda s: text_to_sequence(s, ["english_cleaners"]), Sentences),
+        "text_to_array (cold)": SentencesPerSecond(lambda s: text_to_array(s, ["english_cleaners"]), Sentences, Reset=ClearMemo),
+        "text_to_array (memoized)": SentencesPerSecond(lambda s: text_to_array(s, ["english_cleaners"]), Sentences),
+    }
+    return Results, Mismatches
+
+if __name__ == "__main__":
+    # Text frontend speed check: python -m Scripts.FrontendBenchmark [corpus.txt]
+    Sentences = LoadCorpus(sys.argv[1] if len(sys.argv) > 1 else None)
+    Results, Mismatches = Benchmark(Sentences)
+
+    print(f"{len(Sentences)} sentences")
+    for Name, Rate in Results.items():
+        print(f"{Name:<26} {Rate:>10.0f} sentences/s ({Rate / Results['reference']:.2f}x reference)")
+    for Sentence in Mismatches:
+        print(f"Ids differ from the reference: {Sentence}")
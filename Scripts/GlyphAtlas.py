@@ -0,0 +1,74 @@
+import pygame
+import numpy as np
+
+class GlyphAtlas:
+    """Glyph cache that rasterises every character of a font once into a single sheet.
+
+    Responsibilities:
+        * Renders each glyph with Font.render the first time it is needed and packs it into a grid cell.
+        * Maps characters to stable cell indices (index 0 is always the blank space glyph).
+        * Encodes text grids as arrays of cell indices for the GPU text path.
+    """
+
+    COLUMNS = 32  # Glyph cells per atlas row
+    PRELOAD = "".join(chr(Code) for Code in range(32, 127)) + "█°"  # Printable ASCII + caret/degree glyphs
+
+    def __init__(self, Font: pygame.font.Font, CellSize, Color):
+        self.Font = Font
+        self.Color = Color
+        self.CellSize = tuple(CellSize)  # Spacing of the text grid on screen
+
+        # Rendered glyphs can be larger than the grid spacing, so the atlas cell has to fit the whole glyph
+        GlyphWidth = max(Font.size(Char)[0] for Char in self.PRELOAD)
+        self.GlyphSize = (max(self.CellSize[0], GlyphWidth), max(self.CellSize[1], Font.get_height()))
+
+        self.Indices = {}
+        self.Rects = []
+        self.Version = 0  # Bumped whenever a glyph is added so cached copies of the sheet can refresh
+
+        Rows = -(-len(self.PRELOAD) // self.COLUMNS)
+        self.Surface = pygame.Surface((self.COLUMNS * self.GlyphSize[0], Rows * self.GlyphSize[1]), pygame.SRCALPHA)
+
+        for Char in self.PRELOAD:
+            self.GetIndex(Char)
+
+    @property
+    def Capacity(self) -> int:
+        return self.COLUMNS * (self.Surface.get_height() // self.GlyphSize[1])
+
+    def GetIndex(self, Char: str) -> int:
+        """Return the atlas cell index of a character, rendering it into the sheet on first use."""
+        Index = self.Indices.get(Char)
+        if Index is not None:
+            return Index
+
+        Index = len(self.Rects)
+        if Index >= self.Capacity:
+            self._Grow()
+
+        Rect = pygame.Rect(
+            (Index % self.COLUMNS) * self.GlyphSize[0], (Index // self.COLUMNS) * self.GlyphSize[1],
+            self.GlyphSize[0], self.GlyphSize[1]
+        )
+        # Cells start fully transparent, so a max blend copies the glyph pixels (and alpha) exactly
+        self.Surface.blit(self.Font.render(Char, True, self.Color), Rect.topleft, special_flags=pygame.BLEND_RGBA_MAX)
+
+        self.Indices[Char] = Index
+        self.Rects.append(Rect)
+        self.Version += 1
+        return Index
+
+    def _Grow(self):
+        """Double the number of rows in the sheet, keeping the glyphs already packed."""
+        Width, Height = self.Surface.get_size()
+        Grown = pygame.Surface((Width, Height * 2), pygame.SRCALPHA)
+        Grown.blit(self.Surface, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        self.Surface = Grown
+
+    def EncodeLines(self, Lines, Columns: int, Rows: int) -> np.ndarray:
+        """Return a (Rows, Columns) uint16 array of atlas indices for a text grid, blank cells are 0."""
+        Grid = np.zeros((Rows, Columns), dtype=np.uint16)
+        for Row, Text in enumerate(Lines[:Rows]):
+            Text = Text[:Columns]
+            Grid[Row, :len(Text)] = [self.GetIndex(Char) for Char in Text]
+        return Grid
@@ -35,10 +35,13 @@ def FormatModelSize(size_bytes):
     return f"{size_bytes:.1f} PB"
 
 class LargeLanguageModel:
-    def __init__(self, ModelName, SystemPrompt):
+    def __init__(self, ModelName, SystemPrompt, Stream=True):
         self.Model = ModelName
         self.History = [{"role":"system", "content":SystemPrompt}]
+        self.Stream = Stream
 
+        # Streamed text deltas as they are generated, the finished reply still goes to ResponseQueue
+        self.TokenQueue = queue.Queue()
         self.ResponseQueue = queue.Queue()
         self.InferenceThread = None
         self.IsProcessing = False
@@ -77,17 +80,27 @@ class LargeLanguageModel:
             
             # Retry logic for inference
             max_retries = 3
+            Streamed = []
             for attempt in range(max_retries):
                 try:
-                    Response = ollama.chat(model=self.Model, messages=self.History)
+                    if self.Stream:
+                        Response = self.StreamChat(Streamed)
+                    else:
+                        Response = ollama.chat(model=self.Model, messages=self.History)
                     break
                 except Exception as e:
                     print(f"Inference attempt {attempt + 1} failed: {e}")
+                    if Streamed:
+                        # Part of the reply is already on screen, keep it rather than starting over
+                        Response = {"message": {"role": "assistant", "content": "".join(Streamed)}}
+                        break
                     if attempt < max_retries - 1:
                         time.sleep(1)
                     else:
                         # Fallback response if all attempts fail
-                        Response = {"message": {"content": "I'm experiencing technical difficulties. Please try again."}}
+                        Response = {"message": {"role": "assistant", "content": "I'm experiencing technical difficulties. Please try again."}}
+                        if self.Stream:
+                            self.TokenQueue.put(Response["message"]["content"])
                         
             self.History.append(Response["message"])
 
@@ -98,13 +111,36 @@ class LargeLanguageModel:
             # Remove white space from start and end of it plus lower case
             CleanedSentence = CleanedText.lower().strip()
             # Add a full stop
-            if CleanedText[-1] != ".": CleanedText += "."
+            if CleanedText[-1] != ".":
+                CleanedText += "."
+                if self.Stream:
+                    self.TokenQueue.put(".")
 
             self.ResponseQueue.put(CleanedText)
 
         finally:
             self.IsProcessing = False
 
+    def StreamChat(self, Streamed):
+        """Run a streaming chat request, pushing each text delta to TokenQueue and collecting it in Streamed."""
+        for Chunk in ollama.chat(model=self.Model, messages=self.History, stream=True):
+            Delta = Chunk["message"]["content"]
+            if Delta:
+                Streamed.append(Delta)
+                # New lines are shown as spaces, the same as in the finished reply
+                self.TokenQueue.put(Delta.replace("\n", " "))
+
+        return {"message": {"role": "assistant", "content": "".join(Streamed)}}
+
+    def CheckTokens(self):
+        """Return all text streamed since the last call (empty string if none)."""
+        Tokens = []
+        try:
+            while True:
+                Tokens.append(self.TokenQueue.get_nowait())
+        except queue.Empty:
+            return "".join(Tokens)
+
     def CheckResponse(self):
         try:
             Response = self.ResponseQueue.get_nowait()
@@ -0,0 +1,76 @@
+import os, time, torch
+import numpy as np
+
+from .tacotron2.text.__init__ import text_to_sequence
+
+# Fixed sentences used to measure how far the quantized model drifts from the fp32 one
+QUALITY_SENTENCES = [
+    "Hello, and again, welcome to the Aperture Science computer-aided enrichment center.",
+    "The cake is a lie.",
+    "You are not a good person. You know that, right?",
+    "Please proceed to the chamberlock. Mind the gap.",
+    "This next test involves the Aperture Science Aerial Faith Plate.",
+    "I'm making a note here: huge success.",
+]
+
+def IsQuantizedLayer(Name, Module):
+    """Decoder LSTM cells and linear projections. The location layer is left alone because inference runs
+    its fused fp32 conv weight instead, and memory_layer because it runs once per utterance, not per step."""
+    if not Name.startswith("decoder.") or "location_layer" in Name or "memory_layer" in Name:
+        return False
+    return isinstance(Module, (torch.nn.LSTMCell, torch.nn.Linear))
+
+def QuantizeTacotron2(Model):
+    """Apply int8 dynamic quantization to the Tacotron2 decoder in place (CPU only)."""
+    Spec = {
+        Name: torch.ao.quantization.default_dynamic_qconfig
+        for Name, Module in Model.named_modules() if IsQuantizedLayer(Name, Module)
+    }
+    torch.ao.quantization.quantize_dynamic(Model, Spec, dtype=torch.qint8, inplace=True)
+    return Model
+
+def MelL1(Reference, Candidate, Sentences=QUALITY_SENTENCES, Seed=1234):
+    """Mean absolute postnet mel difference between two Tacotron2 models over a sentence set.
+
+    Both models use the same seeded prenet dropout masks; outputs are compared over the frames both
+    produced.
+    """
+    Losses = []
+    with torch.inference_mode():
+        for Sentence in Sentences:
+            Sequence = torch.from_numpy(np.array(text_to_sequence(Sentence, ["english_cleaners"]))[None, :]).long()
+
+            ReferenceMel = Reference.inference(Sequence, [Seed])[1]
+            CandidateMel = Candidate.inference(Sequence, [Seed])[1]
+
+            Frames = min(ReferenceMel.size(2), CandidateMel.size(2))
+            Losses.append((ReferenceMel[:, :, :Frames] - CandidateMel[:, :, :Frames]).abs().mean().item())
+
+    return sum(Losses) / len(Losses)
+
+def DecoderTime(Model, Sentences=QUALITY_SENTENCES, Seed=1234):
+    """Seconds spent per generated mel frame, averaged over a sentence set."""
+    Frames, Elapsed = 0, 0.0
+    with torch.inference_mode():
+        for Sentence in Sentences:
+            Sequence = torch.from_numpy(np.array(text_to_sequence(Sentence, ["english_cleaners"]))[None, :]).long()
+            Start = time.perf_counter()
+            Frames += Model.inference(Sequence, [Seed])[1].size(2)
+            Elapsed += time.perf_counter() - Start
+    return Elapsed / max(1, Frames)
+
+if __name__ == "__main__":
+    # Quality and speed check: python -m Scripts.Quantization
+    import copy, json
+    from .TextToSpeech import GetTactron2, Directory
+
+    with open(os.path.join(Directory, "..", "Settings.json")) as File:
+        VoiceModels = json.loads(File.read())["VoiceModels"]
+
+    Reference, HyperParams, _ = GetTactron2(VoiceModels["ModelNameTacotron2"], VoiceModels["ModelIDTacotron2"])
+    Reference.cpu()
+    Quantized = QuantizeTacotron2(copy.deepcopy(Reference))
+
+    print(f"Mean mel L1 (int8 vs fp32): {MelL1(Reference, Quantized):.4f}")
+    ReferenceTime, QuantizedTime = DecoderTime(Reference), DecoderTime(Quantized)
+    print(f"Time per frame: fp32 {ReferenceTime * 1000:.2f} ms, int8 {QuantizedTime * 1000:.2f} ms ({ReferenceTime / QuantizedTime:.2f}x)")
@@ -0,0 +1,93 @@
+import time
+import moderngl as mgl
+import numpy as np
+import pygame
+
+class RenderTarget:
+    """GL texture that is allocated once and updated in place every frame.
+
+    Responsibilities:
+        * Owns a persistent texture (and, on demand, a framebuffer to render into it).
+        * Streams frame data through a pixel buffer object so the driver can copy it asynchronously.
+        * Writes just the dirty rectangles of a surface when only part of the frame changed.
+        * Records how long each upload took so the main loop can report it.
+    """
+
+    def __init__(self, Context: mgl.Context, Size, Components: int = 4, Dtype: str = "f1",
+                 Swizzle: str = None, Mipmaps: bool = True, PixelBuffer: bool = True):
+        self.Context = Context
+        self.Size = tuple(Size)
+        self.Mipmaps = Mipmaps
+
+        self.Texture = Context.texture(self.Size, Components, dtype=Dtype)
+        self.Texture.repeat_x, self.Texture.repeat_y = False, False
+        if Swizzle:
+            self.Texture.swizzle = Swizzle
+        if not Mipmaps:
+            self.Texture.filter = (mgl.NEAREST, mgl.NEAREST)
+
+        ByteSize = self.Size[0] * self.Size[1] * Components * int(Dtype[1])
+        self.PixelBuffer = Context.buffer(reserve=ByteSize) if PixelBuffer else None
+        self.Framebuffer = None
+
+        self.UploadTime = 0.0  # Seconds spent in the last upload
+
+    def Upload(self, Data):
+        """Replace the whole texture with new pixel data (any object exposing the buffer protocol)."""
+        Start = time.perf_counter()
+
+        if self.PixelBuffer is not None:
+            # Orphan the old storage so the write never waits on a copy that is still in flight
+            self.PixelBuffer.orphan()
+            self.PixelBuffer.write(Data)
+            self.Texture.write(self.PixelBuffer)
+        else:
+            self.Texture.write(Data)
+
+        if self.Mipmaps:
+            self.Texture.build_mipmaps()
+
+        self.UploadTime = time.perf_counter() - Start
+
+    def UploadRegions(self, Surface: pygame.Surface, Rects):
+        """Write only the given rectangles of a 32 bit pygame surface into the texture."""
+        if len(Rects) == 1 and Rects[0] == Surface.get_rect():
+            self.Upload(Surface.get_view("1"))
+            return
+
+        Start = time.perf_counter()
+
+        if Rects:
+            # Viewport writes of small regions are cheap enough to skip the pixel buffer
+            Pixels = pygame.surfarray.pixels2d(Surface)
+            for Rect in Rects:
+                Region = np.ascontiguousarray(Pixels[Rect.left:Rect.right, Rect.top:Rect.bottom].T)
+                self.Texture.write(Region, viewport=(Rect.x, Rect.y, Rect.w, Rect.h))
+            del Pixels  # Unlocks the surface
+
+            if self.Mipmaps:
+                self.Texture.build_mipmaps()
+
+        self.UploadTime = time.perf_counter() - Start
+
+    def Bind(self):
+        """Direct subsequent rendering into this target's texture."""
+        if self.Framebuffer is None:
+            self.Framebuffer = self.Context.framebuffer(color_attachments=[self.Texture])
+        self.Framebuffer.use()
+
+    def Clear(self):
+        """Fill the texture with opaque black."""
+        self.Bind()
+        self.Framebuffer.clear(0.0, 0.0, 0.0, 1.0)
+        self.Context.screen.use()
+
+    def Use(self, Location: int):
+        self.Texture.use(Location)
+
+    def Release(self):
+        if self.Framebuffer is not None:
+            self.Framebuffer.release()
+        if self.PixelBuffer is not None:
+            self.PixelBuffer.release()
+        self.Texture.release()
@@ -0,0 +1,222 @@
+import os, json, hashlib
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+
+from .tacotron2.text.cleaners import english_cleaners
+
+def FileIdentity(Path):
+    """Ties cached output to a model file by its name, size and modification time, without reading it."""
+    Stat = os.stat(Path)
+    return f"{os.path.basename(Path)}:{Stat.st_size}:{Stat.st_mtime_ns}"
+
+def WriteAtomically(Path, Write, Mode="wb"):
+    """Call Write with an open file, then move the file to Path.
+
+    Written to a temporary name first, so a crash never leaves a truncated file behind.
+    """
+    Temporary = Path + ".tmp"
+    with open(Temporary, Mode) as File:
+        Write(File)
+    os.replace(Temporary, Path)
+
+@lru_cache(maxsize=1024)
+def SentenceKey(Identity: str, Sentence: str) -> str:
+    """Cache key of a sentence: its cleaned text, scoped by the identity of whatever produced the output."""
+    Text = english_cleaners(Sentence.strip())
+    return hashlib.sha256(f"{Identity}\0{Text}".encode("utf-8")).hexdigest()
+
+class AudioCache:
+    """Content-addressed cache of synthesized sentences.
+
+    Responsibilities:
+        * Keys every sentence by its cleaned text and an identity string (model files and the synthesis
+          settings that change the output), so unrelated models or settings never share entries.
+        * Keeps recently used audio in an in-memory LRU tier.
+        * Persists audio as compressed int16 files on disk, evicting the least recently used files once the
+          directory grows past its size cap.
+
+    Only used from the TTS synthesis worker, so it does no locking.
+    """
+
+    def __init__(self, Directory: str, Identity: str, MemoryItems: int = 64, DiskBytes: int = 64 << 20):
+        self.Directory = Directory
+        self.Identity = Identity
+        self.MemoryItems = MemoryItems
+        self.DiskBytes = DiskBytes
+
+        self._Memory = OrderedDict()  # Key -> int16 audio, most recently used last
+        os.makedirs(Directory, exist_ok=True)
+
+        # Disk tier in least recently used order (access time is tracked through the file mtime)
+        Entries = [Entry for Entry in os.scandir(Directory) if Entry.name.endswith(".npz")]
+        Entries.sort(key=lambda Entry: Entry.stat().st_mtime)
+        self._Disk = OrderedDict((Entry.name[:-4], Entry.stat().st_size) for Entry in Entries)
+        self._DiskUsed = sum(self._Disk.values())
+
+    def Key(self, Sentence: str) -> str:
+        return SentenceKey(self.Identity, Sentence)
+
+    def Get(self, Sentence: str):
+        """Cached int16 audio of the sentence, or None."""
+        Key = self.Key(Sentence)
+
+        Audio = self._Memory.get(Key)
+        if Audio is not None:
+            self._Memory.move_to_end(Key)
+            return Audio
+
+        if Key in self._Disk:
+            try:
+                with np.load(self._Path(Key)) as File:
+                    Audio = File["audio"]
+                os.utime(self._Path(Key))
+                self._Disk.move_to_end(Key)
+                self._Remember(Key, Audio)
+                return Audio
+            except (OSError, ValueError, KeyError):
+                self._Forget(Key)
+
+        return None
+
+    def Put(self, Sentence: str, Audio: np.ndarray):
+        Key = self.Key(Sentence)
+        Audio = np.asarray(Audio, dtype=np.int16)
+        self._Remember(Key, Audio)
+
+        if Key in self._Disk:
+            return
+
+        WriteAtomically(self._Path(Key), lambda File: np.savez_compressed(File, audio=Audio))
+
+        Size = os.path.getsize(self._Path(Key))
+        self._Disk[Key] = Size
+        self._DiskUsed += Size
+
+        while self._DiskUsed > self.DiskBytes and len(self._Disk) > 1:
+            self._Forget(next(iter(self._Disk)))
+
+    def _Path(self, Key: str) -> str:
+        return os.path.join(self.Directory, Key + ".npz")
+
+    def _Remember(self, Key: str, Audio: np.ndarray):
+        self._Memory[Key] = Audio
+        self._Memory.move_to_end(Key)
+        while len(self._Memory) > self.MemoryItems:
+            self._Memory.popitem(last=False)
+
+    def _Forget(self, Key: str):
+        self._DiskUsed -= self._Disk.pop(Key, 0)
+        try:
+            os.remove(self._Path(Key))
+        except OSError:
+            pass
+
+class MelCache:
+    """Cache of Tacotron2 postnet mel spectrograms, kept apart from the audio cache.
+
+    Responsibilities:
+        * Keys every sentence by its cleaned text and an identity string covering only the Tacotron2 side
+          (checkpoint file and decoder settings), so changing the vocoder or sample rate still hits.
+        * Stores each mel as a float16 .npy file that is read back memory-mapped.
+        * Tracks the files in an index file in least recently used order and evicts by total bytes, counting
+          evicted files that are still mapped until they can be removed.
+
+    Only used from the TTS synthesis worker, so it does no locking.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, Directory: str, Identity: str, MaxBytes: int = 128 << 20):
+        self.Directory = Directory
+        self.Identity = Identity
+        self.MaxBytes = MaxBytes
+        os.makedirs(Directory, exist_ok=True)
+
+        # Key -> file size, least recently used first
+        self._Index = OrderedDict()
+        try:
+            with open(os.path.join(Directory, self.INDEX_NAME)) as File:
+                for Key, Size in json.load(File):
+                    if os.path.exists(self._Path(Key)):
+                        self._Index[Key] = Size
+        except (OSError, ValueError):
+            pass
+        self._Dirty = False  # Recency changed since the index was last written
+
+        # Evicted files that could not be removed yet (still mapped on Windows), they count against the
+        # size cap until they are gone. Files left over from an earlier session are retried now
+        self._Unremoved = {
+            Entry.name[:-4]: Entry.stat().st_size for Entry in os.scandir(Directory)
+            if Entry.name.endswith(".npy") and Entry.name[:-4] not in self._Index
+        }
+        self._Used = sum(self._Index.values()) + sum(self._Unremoved.values())
+        self._RemoveUnremoved()
+
+    def Key(self, Sentence: str) -> str:
+        return SentenceKey(self.Identity, Sentence)
+
+    def __contains__(self, Sentence: str) -> bool:
+        return self.Key(Sentence) in self._Index
+
+    def Get(self, Sentence: str):
+        """Memory-mapped float16 mel (n_mel_channels, frames) of the sentence, or None."""
+        Key = self.Key(Sentence)
+        if Key not in self._Index:
+            return None
+
+        try:
+            Mel = np.load(self._Path(Key), mmap_mode="r")
+        except (OSError, ValueError):
+            self._Forget(Key)
+            self._Dirty = True
+            return None
+
+        # The index is only rewritten by Put and Flush, not on every hit
+        self._Index.move_to_end(Key)
+        self._Dirty = True
+        return Mel
+
+    def Put(self, Sentence: str, Mel: np.ndarray):
+        Key = self.Key(Sentence)
+
+        WriteAtomically(self._Path(Key), lambda File: np.save(File, np.asarray(Mel, dtype=np.float16)))
+
+        self._Used -= self._Index.pop(Key, 0) + self._Unremoved.pop(Key, 0)
+        self._Index[Key] = os.path.getsize(self._Path(Key))
+        self._Used += self._Index[Key]
+
+        self._RemoveUnremoved()
+        while self._Used > self.MaxBytes and len(self._Index) > 1:
+            self._Forget(next(iter(self._Index)))
+        self._SaveIndex()
+
+    def Flush(self):
+        """Write the index if cache hits changed the recency order since it was last written."""
+        if self._Dirty:
+            self._SaveIndex()
+
+    def _Path(self, Key: str) -> str:
+        return os.path.join(self.Directory, Key + ".npy")
+
+    def _Forget(self, Key: str):
+        self._Unremoved[Key] = self._Unremoved.get(Key, 0) + self._Index.pop(Key, 0)
+        self._Remove(Key)
+
+    def _Remove(self, Key: str):
+        try:
+            os.remove(self._Path(Key))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return  # Still mapped, it keeps counting against the cap and is retried later
+        self._Used -= self._Unremoved.pop(Key)
+
+    def _RemoveUnremoved(self):
+        for Key in list(self._Unremoved):
+            self._Remove(Key)
+
+    def _SaveIndex(self):
+        WriteAtomically(os.path.join(self.Directory, self.INDEX_NAME),
+                        lambda File: json.dump(list(self._Index.items()), File), "w")
+        self._Dirty = False
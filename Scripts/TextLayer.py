@@ -0,0 +1,108 @@
+import numpy as np
+import pygame
+
+class TextLayer:
+    """Keeps a pygame surface in sync with a text grid by re-rendering only the cells that changed.
+
+    Responsibilities:
+        * Diffs every new grid of glyph atlas indices against the previous frame.
+        * Clears and redraws just the changed cells (the phosphor afterglow is done on the GPU).
+        * Returns the dirty pixel rectangles so only those need to be uploaded to the GPU.
+    """
+
+    def __init__(self, Atlas, Surface: pygame.Surface):
+        self.Atlas = Atlas
+        self.Surface = Surface
+        self.CellSize = Atlas.CellSize
+        self.GridSize = (Surface.get_width() // self.CellSize[0], Surface.get_height() // self.CellSize[1])
+
+        # Glyphs larger than a cell spill into the cells to their right and below
+        self.Overflow = (
+            (Atlas.GlyphSize[0] - 1) // self.CellSize[0],
+            (Atlas.GlyphSize[1] - 1) // self.CellSize[1]
+        )
+
+        Columns, Rows = self.GridSize
+        self.Grid = np.zeros((Rows, Columns), dtype=np.uint16)
+        self.FullRedraw = True
+
+    def Invalidate(self):
+        """Clear and redraw the whole surface on the next update."""
+        self.FullRedraw = True
+
+    def Update(self, Lines):
+        """Render the new text grid onto the surface and return the rectangles that changed."""
+        Grid = self.Atlas.EncodeLines(Lines, *self.GridSize)
+
+        if self.FullRedraw:
+            self.FullRedraw = False
+            Rects = [self.Surface.get_rect()]
+        else:
+            Rects = self._DirtyRects(Grid != self.Grid)
+
+        self.Grid = Grid
+
+        for Rect in Rects:
+            self.Surface.fill((0, 0, 0), Rect)
+            self._DrawCells(Rect)
+
+        return Rects
+
+    def _DirtyRects(self, Changed: np.ndarray):
+        """Group the changed cells into non-overlapping, cell aligned rectangles."""
+        if not Changed.any():
+            return []
+
+        # Pixels of a changed glyph can reach into neighbouring cells, those cells are dirty too
+        Covered = Changed.copy()
+        for Step in range(1, self.Overflow[0] + 1):
+            Covered[:, Step:] |= Changed[:, :-Step]
+        Spread = Covered.copy()
+        for Step in range(1, self.Overflow[1] + 1):
+            Covered[Step:, :] |= Spread[:-Step, :]
+
+        # Runs of covered cells per row, runs spanning the same columns on consecutive rows are merged
+        Rects, Open = [], {}
+        for Row in range(Covered.shape[0]):
+            Columns = np.flatnonzero(Covered[Row])
+            Runs = set()
+            if Columns.size:
+                Breaks = np.flatnonzero(np.diff(Columns) > 1)
+                Starts = np.concatenate(([Columns[0]], Columns[Breaks + 1]))
+                Ends = np.concatenate((Columns[Breaks], [Columns[-1]]))
+                Runs = set(zip(Starts.tolist(), Ends.tolist()))
+
+            for Run in list(Open):
+                if Run not in Runs:
+                    Rects.append(Open.pop(Run))
+
+            for Start, End in Runs:
+                if (Start, End) in Open:
+                    Open[(Start, End)].h += self.CellSize[1]
+                else:
+                    Open[(Start, End)] = pygame.Rect(
+                        Start * self.CellSize[0], Row * self.CellSize[1],
+                        (End - Start + 1) * self.CellSize[0], self.CellSize[1]
+                    )
+
+        Rects.extend(Open.values())
+        return Rects
+
+    def _DrawCells(self, Rect: pygame.Rect):
+        """Redraw every glyph that touches the rectangle, clipped to it."""
+        Column0 = max(0, Rect.left // self.CellSize[0] - self.Overflow[0])
+        Row0 = max(0, Rect.top // self.CellSize[1] - self.Overflow[1])
+        Column1 = min(self.GridSize[0], -(-Rect.right // self.CellSize[0]))
+        Row1 = min(self.GridSize[1], -(-Rect.bottom // self.CellSize[1]))
+
+        Rows, Columns = np.nonzero(self.Grid[Row0:Row1, Column0:Column1])
+        Indices = self.Grid[Row0 + Rows, Column0 + Columns]
+
+        Blits = [
+            (self.Atlas.Surface, ((Column0 + Column) * self.CellSize[0], (Row0 + Row) * self.CellSize[1]), self.Atlas.Rects[Index])
+            for Row, Column, Index in zip(Rows.tolist(), Columns.tolist(), Indices.tolist())
+        ]
+
+        self.Surface.set_clip(Rect)
+        self.Surface.blits(Blits, doreturn=False)
+        self.Surface.set_clip(None)
@@ -1,22 +1,39 @@
 import random, time
-from typing import List
+from typing import List, Optional
+
+from .ConversationStore import ConversationStore
+from .TextWrapper import TextWrapper
 
 class TextProcessing:
     """Utility class responsible for formatting and buffering text shown in the terminal UI.
 
     Responsibilities:
-        * Keeps a scrolling buffer of conversation lines.
+        * Keeps a bounded scrolling buffer of conversation lines (older lines can spill to a transcript file).
         * Generates the split left (conversation) / right (system status + logo) panel text grid.
+        * Caches that grid and only recomposes the panels whose content changed.
         * Provides loading screen content.
     """
 
     MAX_LINE_WIDTH = 46  # Characters per conversation line before wrapping
     VISIBLE_CONV_LINES = 41  # Number of conversation lines visible in panel
+    VISIBLE_SYSTEM_LINES = 21  # Number of rotating system lines visible in panel
+    PANEL_ROWS = 43  # Rows between the top and bottom borders
+    SYSTEM_LINE_PERIOD = 2.0  # Seconds between system line rotations
+
+    def __init__(self, LineLimit: int = 2000, TranscriptPath: Optional[str] = None):
+        self.ConversationLines = ConversationStore(self.MAX_LINE_WIDTH, LineLimit, TranscriptPath)
+        self.Wrapper = TextWrapper(self.MAX_LINE_WIDTH)
 
-    def __init__(self):
-        self.ConversationLines: List[str] = []
+        # Wrapper of the entry currently being streamed in, and whether the last stored line is its open line
+        self.StreamWrapper: Optional[TextWrapper] = None
+        self.StreamLineOpen: bool = False
         self.Offset: int = 0
 
+        # Bumped whenever the conversation buffer changes so the layout knows to recompose it
+        self.ConversationVersion: int = 0
+        # Bumped whenever GetMainText returns a grid that differs from the previous one
+        self.Generation: int = 0
+
         # Rotating status/system lines (atmosphere + flavor)
         self.SystemLines = [
             "Error 42: Cake location undisclosed           ",
@@ -86,6 +103,29 @@ class TextProcessing:
             "                     =++%%%%+/:-.                   ",
     ]
 
+        self._BuildStaticLayout()
+
+    def _BuildStaticLayout(self):
+        """Compose the parts of the main grid that never change (borders, logo, spacer rows)."""
+        self._LeftPanel: List[str] = [""] * self.PANEL_ROWS
+        self._RightPanel: List[str] = [""] * self.PANEL_ROWS
+
+        self._LeftPanel[41] = f"|{' ' * 50}|"
+        self._RightPanel[21] = f"|{' ' * 50}|"
+        self._RightPanel[22] = f" {'-' * 50} "
+        self._RightPanel[23] = f" {' ' * 50} "
+        for idx in range(24, self.PANEL_ROWS):
+            self._RightPanel[idx] = self.Logo[idx - 24]
+
+        self._MainText: List[str] = [f" {'-' * 50}  {'-' * 50} ", f"|{' ' * 50}||{' ' * 50}|"]
+        self._MainText += [left + right for left, right in zip(self._LeftPanel, self._RightPanel)]
+        self._MainText += [f"|{' ' * 50}| {self.Logo[-1]}", f" {'-' * 50}  {' ' * 50} "]
+
+        # Keys of the dynamic parts as of the last composition, None forces the first build
+        self._ConversationKey = None
+        self._SystemTick = None
+        self._UserInput = None
+
     def AddConversationText(self, InputText: str, Gap: bool):
         """Add a (possibly multi-line wrapped) conversation entry.
 
@@ -93,25 +133,60 @@ class TextProcessing:
             InputText: Raw text to insert.
             Gap: Whether to visually separate from previous message with a blank spacer line.
         """
-        new_lines: List[str] = [" " * self.MAX_LINE_WIDTH] if Gap else []
+        self.FinishConversationText()
 
-        while InputText:
-            if len(InputText) <= self.MAX_LINE_WIDTH:
-                chunk = InputText
-                InputText = ""
-            else:
-                split_pos = InputText[:self.MAX_LINE_WIDTH].rfind(" ")
-                if split_pos == -1:
-                    chunk = InputText[:self.MAX_LINE_WIDTH]
-                    InputText = InputText[self.MAX_LINE_WIDTH:]
-                else:
-                    chunk = InputText[:split_pos]
-                    InputText = InputText[split_pos + 1:]
-            new_lines.append(chunk.ljust(self.MAX_LINE_WIDTH))
+        new_lines: List[str] = [" " * self.MAX_LINE_WIDTH] if Gap else []
+        new_lines += [line.ljust(self.MAX_LINE_WIDTH) for line in self.Wrapper.Wrap(InputText)]
 
         self.ConversationLines.extend(new_lines)
-        # Keep latest lines in view
-        self.Offset = max(self.Offset, len(self.ConversationLines) - self.VISIBLE_CONV_LINES)
+        self.ConversationVersion += 1
+        # Keep latest lines in view (and never point at lines dropped from the buffer)
+        self.Offset = max(self.Offset, len(self.ConversationLines) - self.VISIBLE_CONV_LINES, self.ConversationLines.FirstIndex)
+
+    def StartConversationText(self, InputText: str, Gap: bool):
+        """Begin a conversation entry that grows as more text is streamed in with AppendConversationText.
+
+        Args:
+            InputText: Initial text of the entry (e.g. the speaker prefix).
+            Gap: Whether to visually separate from previous message with a blank spacer line.
+        """
+        self.FinishConversationText()
+        if Gap:
+            self.ConversationLines.append(" " * self.MAX_LINE_WIDTH)
+
+        self.StreamWrapper = TextWrapper(self.MAX_LINE_WIDTH)
+        self.AppendConversationText(InputText)
+
+    def AppendConversationText(self, InputText: str):
+        """Append streamed text to the entry begun with StartConversationText.
+
+        Only the open last line is rewritten, lines that were already completed are left untouched.
+        """
+        if self.StreamWrapper is None:
+            self.StartConversationText("", False)
+
+        for line in self.StreamWrapper.Feed(InputText):
+            self._PutStreamLine(line)
+            self.StreamLineOpen = False
+
+        if self.StreamWrapper.Line:
+            self._PutStreamLine(self.StreamWrapper.Line)
+            self.StreamLineOpen = True
+
+        self.ConversationVersion += 1
+        # Keep latest lines in view (and never point at lines dropped from the buffer)
+        self.Offset = max(self.Offset, len(self.ConversationLines) - self.VISIBLE_CONV_LINES, self.ConversationLines.FirstIndex)
+
+    def FinishConversationText(self):
+        """Close the streamed entry, later text starts a new entry."""
+        self.StreamWrapper = None
+        self.StreamLineOpen = False
+
+    def _PutStreamLine(self, line: str):
+        if self.StreamLineOpen:
+            self.ConversationLines[-1] = line.ljust(self.MAX_LINE_WIDTH)
+        else:
+            self.ConversationLines.append(line.ljust(self.MAX_LINE_WIDTH))
 
     # Backwards compatibility for existing calls with the misspelled name
     def AddConversatoinText(self, InputText, Gap):  # type: ignore
@@ -119,49 +194,51 @@ class TextProcessing:
 
     def Scroll(self, Amount: int):
         """Scroll the conversation buffer by a signed amount."""
-        self.Offset = max(min(self.Offset + Amount, len(self.ConversationLines) - 1), 0)
+        self.Offset = max(min(self.Offset + Amount, len(self.ConversationLines) - 1), self.ConversationLines.FirstIndex)
 
     def GetLoadingText(self):
         """Return the boot/loading screen content (centered logo)."""
         return ["" * 0] * 13 + [" " * 26 + Line for Line in self.Logo]
 
     def GetMainText(self, UserInput: str):
-        """Build the composite left/right panel text grid with current user input line."""
-
-        conversation_line = lambda n: self.ConversationLines[n + self.Offset] if len(self.ConversationLines) - self.Offset > n else ' ' * self.MAX_LINE_WIDTH
-        system_line = lambda n: self.SystemLines[(int(time.time() * 0.5) + n) % len(self.SystemLines)]
-
-        lines: List[str] = []
-        lines.append(f" {'-' * 50}  {'-' * 50} ")
-        lines.append(f"|{' ' * 50}||{' ' * 50}|")
-
-        for idx in range(43):
-            final_line = ""
-
-            # Left side block (conversation + input)
-            if idx < 41:
-                conv = conversation_line(idx)
-                final_line += f"   {conv}   " if idx % 2 == 0 else f"|  {conv}  |"
-            elif idx == 41:
-                final_line += f"|{' ' * 50}|"
-            elif idx == 42:
-                final_line += f"   >>> {UserInput}{' ' * (43 - len(UserInput))}   "
-
-            # Right side block (system/status/logo)
-            if idx < 21:
-                sysln = system_line(idx)
-                final_line += f"   {sysln}   " if idx % 2 == 0 else f"|  {sysln}  |"
-            elif idx == 21:
-                final_line += f"|{' ' * 50}|"
-            elif idx == 22:
-                final_line += f" {'-' * 50} "
-            elif idx == 23:
-                final_line += f" {' ' * 50} "
-            else:
-                final_line += self.Logo[idx - 24]
-
-            lines.append(final_line)
-
-        lines.append(f"|{' ' * 50}| {self.Logo[-1]}")
-        lines.append(f" {'-' * 50}  {' ' * 50} ")
-        return lines
+        """Build the composite left/right panel text grid with current user input line.
+
+        The grid is cached between calls. The conversation window is only recomposed when the buffer or
+        Offset changed, the system panel when its rotation tick advanced and the input row when the input
+        (including the caret) changed. Generation is bumped whenever the returned grid differs.
+        """
+        changed_rows = set()
+
+        # Left side block (conversation + input)
+        conversation_key = (self.Offset, self.ConversationVersion)
+        if conversation_key != self._ConversationKey:
+            self._ConversationKey = conversation_key
+            for idx in range(self.VISIBLE_CONV_LINES):
+                line_index = idx + self.Offset
+                conv = self.ConversationLines[line_index] if line_index < len(self.ConversationLines) else ' ' * self.MAX_LINE_WIDTH
+                self._SetPanelRow(self._LeftPanel, idx, f"   {conv}   " if idx % 2 == 0 else f"|  {conv}  |", changed_rows)
+
+        if UserInput != self._UserInput:
+            self._UserInput = UserInput
+            self._SetPanelRow(self._LeftPanel, 42, f"   >>> {UserInput}{' ' * (43 - len(UserInput))}   ", changed_rows)
+
+        # Right side block (system/status), the logo below it is static
+        system_tick = int(time.time() / self.SYSTEM_LINE_PERIOD)
+        if system_tick != self._SystemTick:
+            self._SystemTick = system_tick
+            for idx in range(self.VISIBLE_SYSTEM_LINES):
+                sysln = self.SystemLines[(system_tick + idx) % len(self.SystemLines)]
+                self._SetPanelRow(self._RightPanel, idx, f"   {sysln}   " if idx % 2 == 0 else f"|  {sysln}  |", changed_rows)
+
+        for idx in changed_rows:
+            self._MainText[idx + 2] = self._LeftPanel[idx] + self._RightPanel[idx]
+
+        if changed_rows:
+            self.Generation += 1
+        return self._MainText
+
+    @staticmethod
+    def _SetPanelRow(panel: List[str], idx: int, text: str, changed_rows: set):
+        if panel[idx] != text:
+            panel[idx] = text
+            changed_rows.add(idx)
@@ -1,24 +1,33 @@
-import os, json, torch, warnings, threading, re, gdown
+import os, json, torch, warnings, threading, queue, re, itertools, hashlib, gdown
 import numpy as np
-import sounddevice as sd
 
 warnings.filterwarnings("ignore")
 
 from .tacotron2.hparams import create_hparams
 from .tacotron2.model import Tacotron2
+from .tacotron2.scripted import Tacotron2Inference, SCRIPT_VERSION
+from .tacotron2.utils import get_mask_from_lengths
 from .tacotron2.layers import TacotronSTFT
 from .tacotron2.audio_processing import griffin_lim
-from .tacotron2.text.__init__ import text_to_sequence
+from .tacotron2.text.__init__ import text_to_array
+from .tacotron2.text.cmudict import CMUDictIndex, build_index
 
 from .hifigan.env import AttrDict
 from .hifigan.meldataset import MAX_WAV_VALUE
-from .hifigan.models import Generator
+from .hifigan.models import Generator, StreamingGenerator
+
+from .AudioOutput import AudioOutput
+from .Quantization import QuantizeTacotron2
+from .SynthesisCache import AudioCache, MelCache, FileIdentity
 
 Directory = os.path.dirname(os.path.realpath(__file__))
 GoogleDriveDirectory = "https://drive.google.com/uc?export=download&id="
 
 Device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
+# Log mel value of silence (the spectral normalization clamps magnitudes at 1e-5)
+MEL_SILENCE = float(np.log(1e-5))
+
 # Small runtime perf tweaks
 if Device.type == "cpu":
     try:
@@ -50,7 +59,7 @@ def GetHifigan(ModelName, ModelID):
     
     return Model, HyperParams
 
-def GetTactron2(ModelName, ModelID):
+def GetTactron2(ModelName, ModelID, Scripted=False, Quantized=False):
     
     if not os.path.exists(f"{Directory}/models/{ModelName}"):
         gdown.download(GoogleDriveDirectory + ModelID, f"{Directory}/models/{ModelName}", quiet=False)
@@ -61,35 +70,150 @@ def GetTactron2(ModelName, ModelID):
     # Keep default low threshold; we'll override the model decoder threshold after load
     HyperParams.gate_threshold = 0.2
     
-    Model = Tacotron2(HyperParams)
-    StateDict = torch.load(f"{Directory}/models/{ModelName}", weights_only=True, map_location=Device)["state_dict"]
-    Model.load_state_dict(StateDict)
+    Model = Tacotron2(HyperParams).eval()
+    ModelPath = f"{Directory}/models/{ModelName}"
+    OptimizedPath = f"{ModelPath}.optimized"
+
+    # BatchNorm is folded into the Encoder and Postnet convolutions once, the result is cached next to the checkpoint
+    if os.path.exists(OptimizedPath) and os.path.getmtime(OptimizedPath) >= os.path.getmtime(ModelPath):
+        Model.fold_batchnorm()
+        Model.load_state_dict(torch.load(OptimizedPath, weights_only=True, map_location=Device))
+    else:
+        StateDict = torch.load(ModelPath, weights_only=True, map_location=Device)["state_dict"]
+        Model.load_state_dict(StateDict)
+        Model.fold_batchnorm()
+        torch.save(Model.state_dict(), OptimizedPath)
+
     Model.to(Device).eval()  # Remove .half() to avoid data type issues
-    
-    return Model, HyperParams
+
+    # int8 dynamic quantization of the decoder only runs on CPU. It is redone at every start: it needs the
+    # fp32 weights loaded above anyway and only takes a moment, so a cached copy would save nothing
+    if Quantized and Device.type == "cpu":
+        QuantizeTacotron2(Model)
+    elif Quantized:
+        print("Quantized TTS is CPU only, using the fp32 Tacotron2")
+        Quantized = False
+
+    # The scripted inference graph is compiled once and cached next to the checkpoint
+    ScriptedModel = GetScriptedTacotron2(Model, ModelName, ".int8" if Quantized else "") if Scripted else None
+
+    return Model, HyperParams, ScriptedModel
+
+def GetScriptedTacotron2(Model, ModelName, Variant=""):
+    ModelPath = f"{Directory}/models/{ModelName}"
+    ScriptPath = f"{ModelPath}{Variant}.v{SCRIPT_VERSION}.torchscript"
+
+    if os.path.exists(ScriptPath) and os.path.getmtime(ScriptPath) >= os.path.getmtime(ModelPath):
+        try:
+            return torch.jit.load(ScriptPath, map_location=Device).eval()
+        except Exception as e:
+            print(f"Cached TorchScript Tacotron2 could not be loaded, rebuilding: {e}")
+
+    try:
+        ScriptedModel = torch.jit.script(Tacotron2Inference(Model).eval())
+        torch.jit.save(ScriptedModel, ScriptPath)
+        return ScriptedModel
+    except Exception as e:
+        print(f"TorchScript export failed, using the eager Tacotron2: {e}")
+        return None
+
+def GetPronunciationIndex(DictionaryPath):
+    """Memory-mapped index of a CMUDict file, built once and cached next to it."""
+    IndexPath = f"{DictionaryPath}.index"
+
+    if not os.path.exists(IndexPath) or os.path.getmtime(IndexPath) < os.path.getmtime(DictionaryPath):
+        print(f"Building the pronunciation index of {DictionaryPath}")
+        build_index(DictionaryPath, IndexPath)
+
+    return CMUDictIndex(IndexPath)
 
 class TextToSpeech:
-    def __init__(self, HifiganName, Tacotron2Name, HifiganID, Tacotron2ID, StopThreshold=0.2):
+    def __init__(self, HifiganName, Tacotron2Name, HifiganID, Tacotron2ID, StopThreshold=0.2, VocoderChunk=32, DecoderBlock=16, MaxBatch=8, AttentionWindow=None, Scripted=False, Quantized=False, VocoderBFloat16=False, AudioCacheBytes=64 << 20, MelCacheBytes=0, Deterministic=True, PronunciationDictionary=None):
         self.HifiganModel, self.HifiganHyperParams = GetHifigan(HifiganName, HifiganID)
-        self.Tacotron2Model, self.Tacotron2HyperParams = GetTactron2(Tacotron2Name, Tacotron2ID)
+        self.Tacotron2Model, self.Tacotron2HyperParams, self.ScriptedTacotron2 = GetTactron2(Tacotron2Name, Tacotron2ID, Scripted, Quantized)
 
         # Faster inference settings
         # Keep a reasonable cap; too small can truncate longer sentences
         self.Tacotron2Model.decoder.max_decoder_steps = 1000
         self.Tacotron2Model.decoder.gate_threshold = StopThreshold
+
+        # One conv instead of location conv + dense per decoder step. An attention window makes each step
+        # score only that many encoder steps on each side of the previous peak instead of the whole sentence
+        self.Tacotron2Model.decoder.attention_layer.fuse_location_layer()
+        self.Tacotron2Model.decoder.attention_layer.window = AttentionWindow or None
+
+        # Mel frames vocoded per window, bounds HiFi-GAN's activation memory and the latency to the first audio
+        self.VocoderChunk = VocoderChunk
+        # HiFi-GAN autocast type: float16 on GPU, optionally bfloat16 on CPU
+        if Device.type == "cuda":
+            self.VocoderDtype = torch.float16
+        else:
+            self.VocoderDtype = torch.bfloat16 if VocoderBFloat16 else torch.float32
+        # Decoder steps handed to the postnet and vocoder at a time
+        self.DecoderBlock = DecoderBlock
+        # Most sentences synthesized together in one batch
+        self.MaxBatch = MaxBatch
+        # Seed the Prenet dropout from each sentence, so the same sentence always gives the same mel
+        self.Deterministic = Deterministic
+        # Optional ARPAbet mode: words found in a CMUDict file are spelled as phonemes instead of letters
+        self.Pronunciations = GetPronunciationIndex(PronunciationDictionary) if PronunciationDictionary else None
         
         # Keep models in full precision for compatibility
         # Note: Half precision can cause data type mismatches on CPU
-        
-        self.InferenceThread = None
-        self.IsProcessing = False
 
-    @staticmethod
-    def _split_text_keep_punct(text: str):
-        # Split into clauses, keeping ending punctuation as prosody cues
+        # Synthesized sentences are cached per model checkpoints and the settings that change the audio
+        # Mels are cached separately (optional), so a different vocoder or sample rate only re-runs HiFi-GAN
+        self.Cache, self.MelCache = None, None
+        if AudioCacheBytes > 0 or MelCacheBytes > 0:
+            MelIdentity = ":".join(str(Part) for Part in (
+                FileIdentity(f"{Directory}/models/{Tacotron2Name}"), StopThreshold,
+                self.Tacotron2Model.decoder.max_decoder_steps, AttentionWindow or 0, Quantized,
+                self.ScriptedTacotron2 is not None, Deterministic,
+                FileIdentity(PronunciationDictionary) if PronunciationDictionary else None
+            ))
+        if AudioCacheBytes > 0:
+            Identity = ":".join(str(Part) for Part in (
+                MelIdentity, FileIdentity(f"{Directory}/models/{HifiganName}"),
+                self.VocoderDtype, self.Tacotron2HyperParams.sampling_rate
+            ))
+            self.Cache = AudioCache(f"{Directory}/cache/audio", Identity, DiskBytes=AudioCacheBytes)
+        if MelCacheBytes > 0:
+            self.MelCache = MelCache(f"{Directory}/cache/mel", MelIdentity, MaxBytes=MelCacheBytes)
+
+        # Producer/consumer pipeline: finished sentences are queued for synthesis on a worker thread, which
+        # streams the audio into a persistent output, so speech starts after the first sentence
+        self.SentenceQueue = queue.Queue()
+        self.Output = AudioOutput(self.Tacotron2HyperParams.sampling_rate)
+        self.PendingText = ""
+        self.Streaming = False
+        # Cleared when the audio output cannot be opened
+        self.Enabled = True
+
+        # Utterances started but not fully synthesized yet
+        self.PendingUtterances = 0
+        self.PendingLock = threading.Lock()
+
+        self.InferenceThread = threading.Thread(target=self.InferenceTask, daemon=True)
+        self.InferenceThread.start()
+
+    @property
+    def IsProcessing(self):
+        return self.PendingUtterances > 0
+
+    # Split into clauses, keeping ending punctuation as prosody cues
+    _sentence_pattern = re.compile(r"[^.!?;]+[.!?;]?")
+
+    @classmethod
+    def _split_text_keep_punct(cls, text: str):
         # e.g., "Hello, world! How are you?" -> ["Hello, world!", "How are you?"]
-        pattern = r"[^.!?;]+[.!?;]?"
-        return [m.group(0).strip() for m in re.finditer(pattern, text) if m.group(0).strip()]
+        return [m.group(0).strip() for m in cls._sentence_pattern.finditer(text) if m.group(0).strip()]
+
+    def _sentence_seeds(self, Sequences):
+        # Stable across runs and platforms (unlike hash()), derived from the symbol ids the model sees
+        if not self.Deterministic:
+            return None
+        return [int.from_bytes(hashlib.sha256(np.asarray(seq, dtype=np.int64).tobytes()).digest()[:8], "little") >> 1
+                for seq in Sequences]
 
     @staticmethod
     def _trim_trailing_silence(audio: np.ndarray, threshold: int = 400, pad_samples: int = 400):
@@ -104,60 +228,263 @@ class TextToSpeech:
         return audio[:end]
 
     def StartInference(self, Text):
-        if not self.IsProcessing:
-            self.IsProcessing = True
-            self.InferenceThread = threading.Thread(target=self.InferenceTask, args=(Text,))
-            self.InferenceThread.daemon = True
-            self.InferenceThread.start()
+        """Speak a complete piece of text, playback starts as soon as its first sentence is synthesized."""
+        self.StartStream()
+        self.FeedText(Text)
+        self.FinishStream()
 
-    def InferenceTask(self, Text):
+    def StartStream(self):
+        """Begin an utterance whose text arrives in pieces through FeedText (e.g. streamed LLM tokens)."""
+        if not self.Enabled:
+            return
+        if self.Streaming:
+            self.FinishStream()
+
+        # The audio device is opened with the first utterance, TTS that is never turned on never needs it
         try:
-            # Split into shorter chunks but keep punctuation for natural prosody
-            sentences = self._split_text_keep_punct(Text)
+            self.Output.Open()
+        except Exception as e:
+            print(f"TTS audio output could not be opened, speech is disabled: {e}")
+            self.Enabled = False
+            return
+        with self.PendingLock:
+            self.PendingUtterances += 1
+        self.PendingText = ""
+        self.Streaming = True
+
+    def FeedText(self, Text):
+        """Add text to the current utterance, every sentence it completes is queued for synthesis."""
+        if not self.Streaming:
+            self.StartStream()
+        if not self.Streaming:
+            return
+        self.PendingText += Text
+
+        # A sentence is complete once its ending punctuation is followed by more text, which keeps
+        # runs like "?!" or "..." together with their sentence
+        end = 0
+        for m in self._sentence_pattern.finditer(self.PendingText):
+            if m.group(0)[-1] not in ".!?;" or m.end() == len(self.PendingText):
+                break
+            sentence = m.group(0).strip()
+            if sentence:
+                self.SentenceQueue.put(sentence)
+            end = m.end()
+        self.PendingText = self.PendingText[end:]
 
-            audio_segments = []
-            sr = self.Tacotron2HyperParams.sampling_rate
+    def FinishStream(self):
+        """Queue whatever text is left and close the current utterance."""
+        if not self.Streaming:
+            return
+        for sentence in self._split_text_keep_punct(self.PendingText):
+            self.SentenceQueue.put(sentence)
+        self.PendingText = ""
+        self.Streaming = False
+        self.SentenceQueue.put(None)  # End of utterance marker
 
+    def CancelStream(self):
+        """Close the current utterance without speaking its unfinished sentence (e.g. a reply cut off by a
+        model switch). Sentences already queued are still spoken; the utterance still ends, so IsProcessing
+        cannot stay set."""
+        if not self.Streaming:
+            return
+        self.PendingText = ""
+        self.Streaming = False
+        self.SentenceQueue.put(None)  # End of utterance marker
+
+    def Close(self):
+        """Stop playback and release the audio device on exit."""
+        self.Output.Close()
+
+    def InferenceTask(self):
+        # Synthesis worker: turns queued sentences into audio
+        while True:
+            sentence = self.SentenceQueue.get()
+            if sentence is None:
+                self.EndUtterance()
+                continue
+
+            # While audio is already playing, the latency of a batch is hidden, so the sentences waiting
+            # behind this one are synthesized together. Otherwise stream this one to start speaking sooner
+            batch, ended = [sentence], False
+            while self.Output.Buffered > 0 and len(batch) < self.MaxBatch:
+                try:
+                    sentence = self.SentenceQueue.get_nowait()
+                except queue.Empty:
+                    break
+                if sentence is None:
+                    ended = True
+                    break
+                batch.append(sentence)
+
+            try:
+                self.Speak(batch)
+            except Exception as e:
+                print(f"TTS processing failed: {e}")
+
+            if ended:
+                self.EndUtterance()
+
+    def Speak(self, Sentences):
+        """Play sentences in order. Cached ones come from the cache, a single new one is streamed and
+        several new ones are synthesized as a batch first."""
+        Cached = {sent: self.Cache.Get(sent) if self.Cache else None for sent in Sentences}
+        Missing = [sent for sent in dict.fromkeys(Sentences) if Cached[sent] is None]
+
+        # Sentences with a cached mel only need the vocoder, the rest need Tacotron2 as well
+        Decode = [sent for sent in Missing if not (self.MelCache and sent in self.MelCache)]
+        Batched = Decode if len(Decode) > 1 else []
+        if Batched:
+            for sent, audio_data in zip(Batched, self.SynthesizeBatch(Batched)):
+                if audio_data is not None and audio_data.size > 0:
+                    Cached[sent] = audio_data
+                    if self.Cache:
+                        self.Cache.Put(sent, audio_data)
+
+        for sent in Sentences:
+            if Cached[sent] is not None:
+                self.Output.Write(Cached[sent])
+            elif len(sent.strip()) >= 3:
+                # Not batched, or the batch gave no audio for it (e.g. it failed): stream it on its own
+                Cached[sent] = self.SpeakSentence(sent)
+
+    def SpeakSentence(self, Sentence):
+        """Stream one sentence into the output as it is synthesized, returns its complete audio."""
+        chunks = []
+        try:
+            for audio_data in self.Synthesize(Sentence):
+                # Vocoder windows join sample for sample, only the sentence start is crossfaded
+                self.Output.Write(audio_data, Continuous=bool(chunks))
+                chunks.append(audio_data)
+        except Exception as tts_error:
+            # Partial audio is played but never cached
+            print(f"TTS generation failed for sentence '{Sentence}': {tts_error}")
+            return None
+
+        if not chunks:
+            return None
+        audio_data = np.concatenate(chunks)
+        if self.Cache:
+            self.Cache.Put(Sentence, audio_data)
+        return audio_data
+
+    def EndUtterance(self):
+        self.Output.EndUtterance()
+        if self.MelCache:
+            self.MelCache.Flush()
+        underruns = self.Output.TakeUnderruns()
+        if underruns:
+            print(f"TTS audio underran {underruns} time(s), synthesis fell behind playback")
+        with self.PendingLock:
+            self.PendingUtterances -= 1
+
+    def SynthesizeBatch(self, Sentences):
+        """Synthesize several sentences as one padded batch, returns the int16 audio of each in order
+        (None for sentences that are too short or when synthesis fails)."""
+        Results = [None] * len(Sentences)
+        Indices = [i for i, sent in enumerate(Sentences) if len(sent.strip()) >= 3]
+        sents = [Sentences[i].strip() for i in Indices]
+        if not sents:
+            return Results
+
+        try:
             with torch.inference_mode():
-                for Sentence in sentences:
-                    sent = Sentence.strip()
-                    if len(sent) < 3:
-                        continue
-
-                    try:
-                        # Convert to phoneme/id sequence using default english cleaners
-                        TextSequence = np.array(text_to_sequence(sent, ["english_cleaners"]))[None, :]
-                        TextSequence = torch.from_numpy(TextSequence).to(Device).long()
-
-                        # Generate mel and waveform
-                        MelSpectrogram, MelSpectrogramPostnet, GateOutputs, AttentionAlignments = self.Tacotron2Model.inference(TextSequence)
-                        MelSpectrogramPostnet = MelSpectrogramPostnet.float()
-
-                        # Use autocast on GPU for speed
-                        if Device.type == "cuda":
-                            with torch.autocast(device_type="cuda", dtype=torch.float16, enabled=True):
-                                GeneratedAudio = self.HifiganModel(MelSpectrogramPostnet)
-                        else:
-                            GeneratedAudio = self.HifiganModel(MelSpectrogramPostnet)
-
-                        FinalAudio = GeneratedAudio.squeeze() * MAX_WAV_VALUE
-                        audio_data = FinalAudio.cpu().numpy().astype("int16")
-
-                        # Trim trailing silence to avoid long pauses between chunks
-                        audio_data = self._trim_trailing_silence(audio_data)
-                        if audio_data.size > 0:
-                            audio_segments.append(audio_data)
-
-                    except Exception as tts_error:
-                        print(f"TTS generation failed for sentence '{sent}': {tts_error}")
-                        continue
-
-            # Concatenate and play once to avoid inter-chunk gaps
-            if audio_segments:
-                full_audio = np.concatenate(audio_segments)
-                sd.play(full_audio, samplerate=sr, blocking=False)
+                Sequences = [text_to_array(sent, ["english_cleaners"], self.Pronunciations) for sent in sents]
+                InputLengths = torch.tensor([len(seq) for seq in Sequences], dtype=torch.long)
+                Padded = np.zeros((len(Sequences), int(InputLengths.max())), dtype=np.int64)
+                for i, seq in enumerate(Sequences):
+                    Padded[i, :len(seq)] = seq
+                TextSequence = torch.from_numpy(Padded)
 
-        except Exception as e:
-            print(f"TTS processing failed: {e}")
-        finally:
-            self.IsProcessing = False
+                # Decode all sentences in lockstep, each stops at its own gate
+                _, MelSpectrogramPostnet, _, _, MelLengths = self.Tacotron2Model.inference_batch(
+                    TextSequence.to(Device), InputLengths.to(Device), self._sentence_seeds(Sequences))
+
+                if self.MelCache:
+                    for j, Length in enumerate(MelLengths.tolist()):
+                        self.MelCache.Put(sents[j], MelSpectrogramPostnet[j, :, :Length].float().cpu().numpy())
+
+                # Pad with silence rather than zeros, so the vocoder's context past an item's end stays quiet
+                Padding = ~get_mask_from_lengths(MelLengths, MelSpectrogramPostnet.size(2)).unsqueeze(1)
+                MelSpectrogramPostnet = MelSpectrogramPostnet.float().masked_fill(Padding, MEL_SILENCE)
+
+                GeneratedAudio = np.concatenate(list(self.Vocode([MelSpectrogramPostnet])), axis=-1).reshape(len(sents), -1)
+
+            # Cut every item to its true length, then trim its trailing silence
+            Hop = self.HifiganHyperParams.hop_size
+            for j, (i, Length) in enumerate(zip(Indices, MelLengths.tolist())):
+                Results[i] = self._trim_trailing_silence(GeneratedAudio[j, :Length * Hop])
+
+        except Exception as tts_error:
+            print(f"TTS batch generation failed for {len(sents)} sentences: {tts_error}")
+
+        return Results
+
+    def Synthesize(self, Sentence):
+        """Synthesize one sentence, yielding int16 audio one vocoder window at a time (errors propagate)."""
+        sent = Sentence.strip()
+        if len(sent) < 3:
+            return
+
+        with torch.inference_mode():
+            # Convert to phoneme/id sequence using default english cleaners
+            TextSequence = text_to_array(sent, ["english_cleaners"], self.Pronunciations)[None, :]
+            Seeds = self._sentence_seeds(TextSequence)
+            # The memoized id array is read-only and shared, copy it into the tensor
+            TextSequence = torch.tensor(TextSequence, device=Device)
+
+            # Mel frames are vocoded in windows while the decoder is still running, so playback can start
+            # after the first window. The latest audible window and any silent ones after it are held back,
+            # so trailing silence can still be trimmed from the end of the sentence
+            CachedMel = self.MelCache.Get(sent) if self.MelCache else None
+            if CachedMel is not None:
+                MelBlocks = [torch.from_numpy(np.asarray(CachedMel, dtype=np.float32))[None].to(Device)]
+            elif self.ScriptedTacotron2 is not None:
+                # The scripted graph decodes the whole sentence at once, trading streaming for less overhead
+                Decoder = self.Tacotron2Model.decoder
+                Decoder.prenet.seed(Seeds, Decoder.max_decoder_steps, Device)
+                MelBlocks = [self.ScriptedTacotron2(TextSequence, Decoder.max_decoder_steps, Decoder.gate_threshold, Decoder.prenet.masks, Decoder.attention_layer.window or 0)[1]]
+            else:
+                MelBlocks = self.Tacotron2Model.inference_stream(TextSequence, self.DecoderBlock, Seeds)
+
+            if CachedMel is None and self.MelCache:
+                MelBlocks = self.RecordMel(sent, MelBlocks)
+            held = []
+            for audio_data in self.Vocode(MelBlocks):
+                if held and np.abs(audio_data.astype(np.int32)).max() > 400:
+                    yield np.concatenate(held)
+                    held = []
+                held.append(audio_data)
+
+        # Trim trailing silence to avoid long pauses between chunks
+        if held:
+            yield self._trim_trailing_silence(np.concatenate(held))
+
+    def RecordMel(self, Sentence, MelBlocks):
+        """Pass mel blocks through, caching the whole mel once the last block went by."""
+        blocks = []
+        for MelSpectrogramPostnet in MelBlocks:
+            blocks.append(MelSpectrogramPostnet)
+            yield MelSpectrogramPostnet
+        if blocks:
+            self.MelCache.Put(Sentence, torch.cat(blocks, dim=2)[0].float().cpu().numpy())
+
+    def Vocode(self, MelBlocks):
+        """Turn postnet mel blocks into int16 audio, one window of VocoderChunk frames at a time.
+
+        A batch of one yields 1-D audio, larger batches yield (batch, samples) windows.
+        """
+        Vocoder = StreamingGenerator(self.HifiganModel, self.VocoderChunk)
+
+        # None marks the end of the blocks, the vocoder then flushes its last windows
+        for MelSpectrogramPostnet in itertools.chain(MelBlocks, [None]):
+            # Use autocast on GPU for speed, and bfloat16 on CPU when enabled
+            with torch.autocast(device_type=Device.type, dtype=self.VocoderDtype, enabled=self.VocoderDtype != torch.float32):
+                if MelSpectrogramPostnet is None:
+                    GeneratedAudio = Vocoder.flush()
+                else:
+                    GeneratedAudio = Vocoder.feed(MelSpectrogramPostnet.float())
+
+            if GeneratedAudio.size(2):
+                FinalAudio = GeneratedAudio.float().squeeze(1) * MAX_WAV_VALUE
+                yield FinalAudio.squeeze(0).cpu().numpy().astype("int16")
@@ -0,0 +1,53 @@
+from typing import List
+
+class TextWrapper:
+    """Word wrapper for conversation text that runs in linear time and can be fed incrementally.
+
+    Responsibilities:
+        * Breaks text at the last space that fits in the line width, or hard splits words that do not fit.
+        * Treats newlines as forced line breaks and expands tabs to spaces.
+        * Keeps the last, still open line so streamed text can be appended without re-wrapping.
+    """
+
+    TAB_SIZE = 4
+
+    def __init__(self, Width: int):
+        self.Width = Width
+        self.Line = ""  # Open line, not longer than Width; more text may still be appended to it
+
+    def Wrap(self, Text: str) -> List[str]:
+        """Wrap a complete piece of text and return all of its lines."""
+        self.Line = ""
+        Lines = self.Feed(Text)
+        if self.Line:
+            Lines.append(self.Line)
+        self.Line = ""
+        return Lines
+
+    def Feed(self, Text: str) -> List[str]:
+        """Append text to the open line and return the lines that were completed by it."""
+        Lines: List[str] = []
+        Segments = Text.replace("\r", "").split("\n")
+
+        for Count, Segment in enumerate(Segments):
+            if Count > 0:
+                # Forced break: the open line is finished as it is
+                Lines.append(self.Line)
+                self.Line = ""
+
+            Pending = (self.Line + Segment).expandtabs(self.TAB_SIZE) if "\t" in Segment else self.Line + Segment
+
+            # Walk the text with an index, each search only looks at one line width of characters
+            Start = 0
+            while len(Pending) - Start > self.Width:
+                Split = Pending.rfind(" ", Start, Start + self.Width)
+                if Split == -1:
+                    Lines.append(Pending[Start:Start + self.Width])
+                    Start += self.Width
+                else:
+                    Lines.append(Pending[Start:Split])
+                    Start = Split + 1
+
+            self.Line = Pending[Start:]
+
+        return Lines
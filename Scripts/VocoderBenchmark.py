@@ -0,0 +1,58 @@
+import time, torch
+
+from .hifigan.models import StreamingGenerator
+
+def RealTimeFactor(Function, MelSpectrogram, HopSize, SamplingRate, Repeats=3):
+    """Seconds of compute per second of audio (below 1.0 is faster than real time), best of a few runs."""
+    AudioSeconds = MelSpectrogram.size(2) * HopSize / SamplingRate
+    Best = float("inf")
+    with torch.inference_mode():
+        Function(MelSpectrogram)  # Warm-up
+        for _ in range(Repeats):
+            Start = time.perf_counter()
+            Function(MelSpectrogram)
+            Best = min(Best, time.perf_counter() - Start)
+    return Best / AudioSeconds
+
+def Benchmark(Model, HyperParams, Frames=400, Device="cpu"):
+    """Real-time factor of the HiFi-GAN variants on a random mel spectrogram of the given length."""
+    torch.manual_seed(0)
+    MelSpectrogram = torch.randn(1, HyperParams.num_mels, Frames, device=Device) - 6.0
+    Hop, Rate = HyperParams.hop_size, HyperParams.sampling_rate
+
+    def Streamed(Mel):
+        Vocoder = StreamingGenerator(Model, 32)
+        Vocoder.feed(Mel)
+        return Vocoder.flush()
+
+    def BFloat16(Mel):
+        with torch.autocast(device_type=torch.device(Device).type, dtype=torch.bfloat16):
+            return Model.inference(Mel)
+
+    Results = {
+        "forward": RealTimeFactor(Model, MelSpectrogram, Hop, Rate),
+        "inference": RealTimeFactor(Model.inference, MelSpectrogram, Hop, Rate),
+        "inference (32 frame windows)": RealTimeFactor(Streamed, MelSpectrogram, Hop, Rate),
+        "inference (bfloat16)": RealTimeFactor(BFloat16, MelSpectrogram, Hop, Rate),
+    }
+
+    # The inference path must produce the same audio as forward
+    with torch.inference_mode():
+        Difference = (Model(MelSpectrogram) - Model.inference(MelSpectrogram)).abs().max().item()
+
+    return Results, Difference
+
+if __name__ == "__main__":
+    # Vocoder speed check: python -m Scripts.VocoderBenchmark
+    import os, json
+    from .TextToSpeech import GetHifigan, Directory, Device
+
+    with open(os.path.join(Directory, "..", "Settings.json")) as File:
+        VoiceModels = json.loads(File.read())["VoiceModels"]
+
+    Model, HyperParams = GetHifigan(VoiceModels["ModelNameHifigan"], VoiceModels["ModelIDHifigan"])
+    Results, Difference = Benchmark(Model, HyperParams, Device=Device)
+
+    for Name, Factor in Results.items():
+        print(f"{Name:<30} RTF {Factor:.3f} ({Results['forward'] / Factor:.2f}x forward)")
+    print(f"Max difference between forward and inference: {Difference:.2e}")
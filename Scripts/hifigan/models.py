@@ -1,3 +1,4 @@
+import math
 import torch
 import torch.nn.functional as F
 import torch.nn as nn
@@ -41,6 +42,14 @@ class ResBlock1(torch.nn.Module):
             x = xt + x
         return x
 
+    def inference(self, x):
+        """ forward with in-place activations and residual adds, x is left untouched """
+        for c1, c2 in zip(self.convs1, self.convs2):
+            xt = c1(F.leaky_relu(x, LRELU_SLOPE))
+            xt = c2(F.leaky_relu_(xt, LRELU_SLOPE))
+            x = xt.add_(x)
+        return x
+
     def remove_weight_norm(self):
         for l in self.convs1:
             remove_weight_norm(l)
@@ -67,6 +76,12 @@ class ResBlock2(torch.nn.Module):
             x = xt + x
         return x
 
+    def inference(self, x):
+        """ forward with in-place residual adds, x is left untouched """
+        for c in self.convs:
+            x = c(F.leaky_relu(x, LRELU_SLOPE)).add_(x)
+        return x
+
     def remove_weight_norm(self):
         for l in self.convs:
             remove_weight_norm(l)
@@ -115,6 +130,18 @@ class Generator(torch.nn.Module):
 
         return x
 
+    def inference(self, x):
+        """ forward for inference, activations and the resblock average reuse their tensors in place """
+        x = self.conv_pre(x)
+        for i in range(self.num_upsamples):
+            x = self.ups[i](F.leaky_relu_(x, LRELU_SLOPE))
+            xs = self.resblocks[i*self.num_kernels].inference(x)
+            for j in range(1, self.num_kernels):
+                xs.add_(self.resblocks[i*self.num_kernels+j].inference(x))
+            x = xs.div_(self.num_kernels)
+        x = self.conv_post(F.leaky_relu_(x))
+        return torch.tanh_(x)
+
     def remove_weight_norm(self):
         #print('Removing weight norm...')
         for l in self.ups:
@@ -124,6 +151,87 @@ class Generator(torch.nn.Module):
         remove_weight_norm(self.conv_pre)
         remove_weight_norm(self.conv_post)
 
+    def receptive_field(self):
+        """Mel frames of context on each side that an output sample depends on."""
+        frames = (self.conv_pre.kernel_size[0] - 1) // 2 * self.conv_pre.dilation[0]
+        scale = 1
+        for i, up in enumerate(self.ups):
+            # A transposed conv output sample is built from at most ceil(k/u) input samples
+            frames += math.ceil(up.kernel_size[0] / up.stride[0]) / scale
+            scale *= up.stride[0]
+            # The parallel resblocks run their convs one after another, the widest block sets the reach
+            reach = 0
+            for j in range(self.num_kernels):
+                block = self.resblocks[i*self.num_kernels+j]
+                reach = max(reach, sum((m.kernel_size[0] - 1) // 2 * m.dilation[0]
+                                       for m in block.modules() if isinstance(m, Conv1d)))
+            frames += reach / scale
+        frames += (self.conv_post.kernel_size[0] - 1) // 2 / scale
+        return math.ceil(frames)
+
+
+class StreamingGenerator:
+    """Runs a Generator over a mel spectrogram that arrives in pieces.
+
+    Each window of chunk_frames frames is vocoded together with enough frames of context on both
+    sides to cover the receptive field, and only the audio of the window itself is kept. Peak memory
+    is bounded by the window size and the output matches vocoding the whole spectrogram at once.
+    """
+
+    def __init__(self, generator, chunk_frames=64, context=None):
+        self.generator = generator
+        self.chunk_frames = chunk_frames
+        self.context = generator.receptive_field() if context is None else context
+        self.hop = math.prod(generator.h.upsample_rates)
+        self.reset()
+
+    def reset(self):
+        self.mel = None  # Frames from absolute frame self.offset on
+        self.offset = 0
+        self.total = 0  # Frames fed so far
+        self.emitted = 0  # Frames whose audio has been returned
+
+    def feed(self, mel):
+        """Append mel frames (batch, mels, frames) and return the audio of every window that is now complete."""
+        self.mel = mel if self.mel is None else torch.cat((self.mel, mel), dim=2)
+        self.total += mel.size(2)
+
+        chunks = []
+        while self.total - self.emitted >= self.chunk_frames + self.context:
+            chunks.append(self._vocode(self.chunk_frames))
+        return self._join(chunks, mel)
+
+    def flush(self):
+        """Return the audio of the frames that are left and start over."""
+        chunks = []
+        while self.emitted < self.total:
+            chunks.append(self._vocode(min(self.chunk_frames, self.total - self.emitted)))
+        audio = self._join(chunks, self.mel)
+        self.reset()
+        return audio
+
+    def _vocode(self, frames):
+        """Audio of the next frames frames, vocoded with their context on both sides."""
+        start, end = self.emitted, self.emitted + frames
+        left = max(0, start - self.context)
+        right = min(self.total, end + self.context)
+        y = self.generator.inference(self.mel[:, :, left-self.offset:right-self.offset])
+        self.emitted = end
+
+        # The next window reaches back to end - context at most
+        keep = max(self.offset, end - self.context)
+        self.mel = self.mel[:, :, keep-self.offset:]
+        self.offset = keep
+        return y[:, :, (start-left)*self.hop:(end-left)*self.hop]
+
+    @staticmethod
+    def _join(chunks, like):
+        if chunks:
+            return torch.cat(chunks, dim=2)
+        if like is None:
+            return torch.zeros(1, 1, 0)
+        return like.new_zeros((like.size(0), 1, 0))
+
 
 class DiscriminatorP(torch.nn.Module):
     def __init__(self, period, kernel_size=5, stride=3, use_spectral_norm=False):
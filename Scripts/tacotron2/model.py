@@ -3,6 +3,7 @@ import torch
 from torch.autograd import Variable
 from torch import nn
 from torch.nn import functional as F
+from torch.nn.utils.fusion import fuse_conv_bn_eval
 from .layers import ConvNorm, LinearNorm
 from .utils import to_gpu, get_mask_from_lengths
 
@@ -25,6 +26,12 @@ class LocationLayer(nn.Module):
         processed_attention = self.location_dense(processed_attention)
         return processed_attention
 
+    def fused_weight(self):
+        """ Single conv weight equal to location_conv followed by location_dense """
+        return torch.einsum('of,fik->oik',
+                            self.location_dense.linear_layer.weight,
+                            self.location_conv.conv.weight).contiguous()
+
 
 class Attention(nn.Module):
     def __init__(self, attention_rnn_dim, embedding_dim, attention_dim,
@@ -40,6 +47,16 @@ class Attention(nn.Module):
                                             attention_dim)
         self.score_mask_value = -float("inf")
 
+        # Inference only: fused location weight (see fuse_location_layer) and
+        # encoder steps scored on each side of the previous attention peak
+        self.register_buffer('location_weight', None, persistent=False)
+        self.window = None
+
+    def fuse_location_layer(self):
+        """ Folds the location conv and dense layer into one conv for inference """
+        with torch.no_grad():
+            self.location_weight = self.location_layer.fused_weight()
+
     def get_alignment_energies(self, query, processed_memory,
                                attention_weights_cat):
         """
@@ -73,6 +90,11 @@ class Attention(nn.Module):
         attention_weights_cat: previous and cummulative attention weights
         mask: binary mask for padded data
         """
+        if not self.training and self.location_weight is not None:
+            return self.inference_forward(
+                attention_hidden_state, memory, processed_memory,
+                attention_weights_cat, mask)
+
         alignment = self.get_alignment_energies(
             attention_hidden_state, processed_memory, attention_weights_cat)
 
@@ -85,6 +107,46 @@ class Attention(nn.Module):
 
         return attention_context, attention_weights
 
+    def inference_forward(self, attention_hidden_state, memory,
+                          processed_memory, attention_weights_cat, mask):
+        """ forward with the fused location conv, scoring only the encoder
+        steps inside the window around the previous attention peak (all of
+        them if window is None)
+        """
+        max_time = memory.size(1)
+        if self.window is None:
+            lo, hi = 0, max_time
+        else:
+            peak = attention_weights_cat[:, 0].argmax(dim=1)
+            lo = max(0, int(peak.min()) - self.window)
+            hi = min(max_time, int(peak.max()) + self.window + 1)
+
+        # The conv needs its padding worth of context around the window,
+        # outside the sequence that context is the zero padding
+        padding = (self.location_weight.size(2) - 1) // 2
+        clo, chi = max(0, lo - padding), min(max_time, hi + padding)
+        processed_attention_weights = F.conv1d(
+            attention_weights_cat[:, :, clo:chi], self.location_weight,
+            padding=padding)[:, :, lo - clo:hi - clo].transpose(1, 2)
+
+        processed_query = self.query_layer(attention_hidden_state.unsqueeze(1))
+        energies = self.v(torch.tanh(
+            processed_query + processed_attention_weights +
+            processed_memory[:, lo:hi])).squeeze(-1)
+
+        if mask is not None:
+            energies.data.masked_fill_(mask[:, lo:hi], self.score_mask_value)
+
+        window_weights = F.softmax(energies, dim=1)
+        attention_context = torch.bmm(
+            window_weights.unsqueeze(1), memory[:, lo:hi]).squeeze(1)
+
+        if lo == 0 and hi == max_time:
+            return attention_context, window_weights
+        attention_weights = window_weights.new_zeros(memory.size(0), max_time)
+        attention_weights[:, lo:hi] = window_weights
+        return attention_context, attention_weights
+
 
 class Prenet(nn.Module):
     def __init__(self, in_dim, sizes):
@@ -93,10 +155,44 @@ class Prenet(nn.Module):
         self.layers = nn.ModuleList(
             [LinearNorm(in_size, out_size, bias=False)
              for (in_size, out_size) in zip(in_sizes, sizes)])
+        self._buffer = None
+
+        # Deterministic inference: dropout masks for every decoder step,
+        # (B, layers, steps, size), filled by seed() and read by forward()
+        self.masks = None
+        self.step = 0
+
+    def seed(self, seeds, steps, device):
+        """ Draws the dropout masks of the next decode from one seed per
+        batch item, None switches back to random dropout
+        """
+        if seeds is None:
+            self.masks = None
+            return
+
+        shape = (len(seeds), len(self.layers), steps,
+                 max(linear.linear_layer.out_features for linear in self.layers))
+        if self._buffer is None or self._buffer.shape != shape or \
+                self._buffer.device != torch.device(device):
+            self._buffer = torch.empty(shape, device=device)
+
+        generator = torch.Generator(device=device)
+        for b, seed in enumerate(seeds):
+            generator.manual_seed(seed)
+            self._buffer[b].bernoulli_(0.5, generator=generator)
+        self.masks = self._buffer.mul_(2.0)  # Kept units are scaled by 1 / (1 - p)
+        self.step = 0
 
     def forward(self, x):
-        for linear in self.layers:
-            x = F.dropout(F.relu(linear(x)), p=0.5, training=True)
+        if self.masks is None or x.dim() != 2:
+            for linear in self.layers:
+                x = F.dropout(F.relu(linear(x)), p=0.5, training=True)
+            return x
+
+        for i, linear in enumerate(self.layers):
+            x = F.relu(linear(x))
+            x = x * self.masks[:, i, self.step, :x.size(1)]
+        self.step += 1
         return x
 
 
@@ -140,11 +236,66 @@ class Postnet(nn.Module):
 
     def forward(self, x):
         for i in range(len(self.convolutions) - 1):
-            x = F.dropout(torch.tanh(self.convolutions[i](x)), 0.5, self.training)
-        x = F.dropout(self.convolutions[-1](x), 0.5, self.training)
+            x = torch.tanh(self.convolutions[i](x))
+            if self.training:
+                x = F.dropout(x, 0.5, self.training)
+        x = self.convolutions[-1](x)
+        if self.training:
+            x = F.dropout(x, 0.5, self.training)
 
         return x
 
+    def receptive_field(self):
+        """ Frames of context on each side that an output frame depends on """
+        return sum((c[0].conv.kernel_size[0] - 1) // 2 * c[0].conv.dilation[0]
+                   for c in self.convolutions)
+
+
+class StreamingPostnet:
+    """ Applies the Postnet residual to decoder frames as they arrive
+        - A frame is final once receptive_field() frames after it are known,
+          so the output matches running the Postnet over the whole spectrogram
+    """
+
+    def __init__(self, postnet):
+        self.postnet = postnet
+        self.context = postnet.receptive_field()
+        self.reset()
+
+    def reset(self):
+        self.mel = None  # Frames from absolute frame self.offset on
+        self.offset = 0
+        self.emitted = 0  # Frames returned so far
+
+    def feed(self, mel_outputs):
+        """ Append decoder frames, returns the postnet frames that are now final """
+        self.mel = mel_outputs if self.mel is None else torch.cat(
+            (self.mel, mel_outputs), dim=2)
+        total = self.offset + self.mel.size(2)
+        return self._apply(max(self.emitted, total - self.context))
+
+    def flush(self):
+        """ Returns the remaining postnet frames and starts over """
+        mel_outputs_postnet = self._apply(self.offset + self.mel.size(2))
+        self.reset()
+        return mel_outputs_postnet
+
+    def _apply(self, end):
+        start = self.emitted
+        if end <= start:
+            return self.mel[:, :, :0]
+        # Run over everything buffered from the left context of start on,
+        # then keep only the left context of the next call
+        left = max(0, start - self.context) - self.offset
+        mel = self.mel[:, :, left:]
+        mel_outputs_postnet = (mel + self.postnet(mel))[
+            :, :, start - self.offset - left:end - self.offset - left]
+        self.emitted = end
+        keep = max(self.offset, end - self.context)
+        self.mel = self.mel[:, :, keep - self.offset:]
+        self.offset = keep
+        return mel_outputs_postnet
+
 
 class Encoder(nn.Module):
     """Encoder module:
@@ -191,13 +342,33 @@ class Encoder(nn.Module):
 
     def inference(self, x):
         for conv in self.convolutions:
-            x = F.dropout(F.relu(conv(x)), 0.5, self.training)
+            x = F.relu(conv(x))
+
+        x = x.transpose(1, 2)
+
+        self.lstm.flatten_parameters()
+        outputs, _ = self.lstm(x)
+
+        return outputs
+
+    def inference_batch(self, x, input_lengths):
+        """ Inference over a padded batch, each item is encoded as if it ran alone """
+        # Padding is zeroed before every convolution, as the convolution's own zero padding would be
+        mask = get_mask_from_lengths(input_lengths, x.size(2)).unsqueeze(1).to(x.dtype)
+        for conv in self.convolutions:
+            x = F.relu(conv(x * mask))
 
         x = x.transpose(1, 2)
 
+        x = nn.utils.rnn.pack_padded_sequence(
+            x, input_lengths.cpu(), batch_first=True, enforce_sorted=False)
+
         self.lstm.flatten_parameters()
         outputs, _ = self.lstm(x)
 
+        outputs, _ = nn.utils.rnn.pad_packed_sequence(
+            outputs, batch_first=True, total_length=mask.size(2))
+
         return outputs
 
 
@@ -378,6 +549,82 @@ class Decoder(nn.Module):
         gate_prediction = self.gate_layer(decoder_hidden_attention_context)
         return decoder_output, gate_prediction, self.attention_weights
 
+    def initialize_inference_buffers(self, memory):
+        """ Allocates the concatenation and output buffers used by decode_into
+        PARAMS
+        ------
+        memory: Encoder outputs
+        """
+        B = memory.size(0)
+        MAX_TIME = memory.size(1)
+        E = self.encoder_embedding_dim
+
+        self.cell_input = memory.new_zeros(B, self.prenet_dim + E)
+        self.attention_weights_cat = memory.new_zeros(B, 2, MAX_TIME)
+        self.decoder_rnn_input = memory.new_zeros(B, self.attention_rnn_dim + E)
+        self.decoder_hidden_attention_context = memory.new_zeros(
+            B, self.decoder_rnn_dim + E)
+
+        self.mel_buffer = memory.new_zeros(
+            self.max_decoder_steps, B, self.n_mel_channels * self.n_frames_per_step)
+        self.gate_buffer = memory.new_zeros(self.max_decoder_steps, B, 1)
+        self.alignment_buffer = memory.new_zeros(
+            self.max_decoder_steps, B, MAX_TIME)
+
+    def decode_into(self, decoder_input, step):
+        """ Inference decoder step that fills preallocated buffers instead of
+        concatenating, computes exactly what decode computes in eval mode
+        PARAMS
+        ------
+        decoder_input: prenet output of the previous mel output
+        step: decoder step, selects the output buffer rows
+
+        RETURNS
+        -------
+        mel_output: view of the step's row in mel_buffer
+        gate_output: view of the step's row in gate_buffer
+        """
+        E = self.encoder_embedding_dim
+
+        self.cell_input[:, :-E].copy_(decoder_input)
+        self.cell_input[:, -E:].copy_(self.attention_context)
+        self.attention_hidden, self.attention_cell = self.attention_rnn(
+            self.cell_input, (self.attention_hidden, self.attention_cell))
+
+        self.attention_weights_cat[:, 0].copy_(self.attention_weights)
+        self.attention_weights_cat[:, 1].copy_(self.attention_weights_cum)
+        self.attention_context, self.attention_weights = self.attention_layer(
+            self.attention_hidden, self.memory, self.processed_memory,
+            self.attention_weights_cat, self.mask)
+
+        self.attention_weights_cum += self.attention_weights
+        self.decoder_rnn_input[:, :-E].copy_(self.attention_hidden)
+        self.decoder_rnn_input[:, -E:].copy_(self.attention_context)
+        self.decoder_hidden, self.decoder_cell = self.decoder_rnn(
+            self.decoder_rnn_input, (self.decoder_hidden, self.decoder_cell))
+
+        self.decoder_hidden_attention_context[:, :-E].copy_(self.decoder_hidden)
+        self.decoder_hidden_attention_context[:, -E:].copy_(
+            self.attention_context)
+
+        self.mel_buffer[step].copy_(
+            self.linear_projection(self.decoder_hidden_attention_context))
+        self.gate_buffer[step].copy_(
+            self.gate_layer(self.decoder_hidden_attention_context))
+        self.alignment_buffer[step].copy_(self.attention_weights)
+        return self.mel_buffer[step], self.gate_buffer[step]
+
+    def parse_decoder_buffers(self, start, end):
+        """ Same as parse_decoder_outputs, for the buffer rows of steps start to end """
+        alignments = self.alignment_buffer[start:end].transpose(0, 1)
+        gate_outputs = self.gate_buffer[start:end].transpose(0, 1).contiguous()
+        mel_outputs = self.mel_buffer[start:end].transpose(0, 1).contiguous()
+        mel_outputs = mel_outputs.view(
+            mel_outputs.size(0), -1, self.n_mel_channels)
+        mel_outputs = mel_outputs.transpose(1, 2)
+
+        return mel_outputs, gate_outputs, alignments
+
     def forward(self, memory, decoder_inputs, memory_lengths):
         """ Decoder forward pass for training
         PARAMS
@@ -415,11 +662,12 @@ class Decoder(nn.Module):
 
         return mel_outputs, gate_outputs, alignments
 
-    def inference(self, memory):
+    def inference(self, memory, seeds=None):
         """ Decoder inference
         PARAMS
         ------
         memory: Encoder outputs
+        seeds: Prenet dropout seed per batch item, None for random dropout
 
         RETURNS
         -------
@@ -427,31 +675,105 @@ class Decoder(nn.Module):
         gate_outputs: gate outputs from the decoder
         alignments: sequence of attention weights from the decoder
         """
+        # The decoder never runs more than max_decoder_steps, so this is a single block
+        return next(self.inference_stream(
+            memory, self.max_decoder_steps, seeds))
+
+    def inference_stream(self, memory, block_steps=16, seeds=None):
+        """ Decoder inference that hands out its outputs as it goes
+        PARAMS
+        ------
+        memory: Encoder outputs
+        block_steps: decoder steps per yielded block
+        seeds: Prenet dropout seed per batch item, None for random dropout
+
+        YIELDS
+        -------
+        mel_outputs: mel outputs of the block's decoder steps
+        gate_outputs: gate outputs of the block's decoder steps
+        alignments: attention weights of the block's decoder steps
+        """
         decoder_input = self.get_go_frame(memory)
 
         self.initialize_decoder_states(memory, mask=None)
+        self.initialize_inference_buffers(memory)
+        self.prenet.seed(seeds, self.max_decoder_steps, memory.device)
 
-        mel_outputs, gate_outputs, alignments = [], [], []
+        start = 0
+        steps = 0
         while True:
             decoder_input = self.prenet(decoder_input)
-            mel_output, gate_output, alignment = self.decode(decoder_input)
-
-            mel_outputs += [mel_output.squeeze(1)]
-            gate_outputs += [gate_output]
-            alignments += [alignment]
+            mel_output, gate_output = self.decode_into(decoder_input, steps)
+            steps += 1
 
+            finished = False
             if torch.sigmoid(gate_output.data) > self.gate_threshold:
+                finished = True
+            elif steps == self.max_decoder_steps:
+                print("Warning! Reached max decoder steps")
+                finished = True
+
+            if finished or steps - start == block_steps:
+                yield self.parse_decoder_buffers(start, steps)
+                start = steps
+
+            if finished:
+                return
+
+            decoder_input = mel_output
+
+    def inference_batch(self, memory, memory_lengths, seeds=None):
+        """ Decoder inference for a padded batch, all items are decoded in lockstep
+        PARAMS
+        ------
+        memory: Encoder outputs
+        memory_lengths: Encoder output lengths for attention masking
+        seeds: Prenet dropout seed per batch item, None for random dropout
+
+        RETURNS
+        -------
+        mel_outputs: mel outputs from the decoder
+        gate_outputs: gate outputs from the decoder
+        alignments: sequence of attention weights from the decoder
+        mel_lengths: frames of each item up to and including its gate stop
+        """
+        decoder_input = self.get_go_frame(memory)
+
+        self.initialize_decoder_states(
+            memory, mask=~get_mask_from_lengths(memory_lengths))
+
+        mel_lengths = torch.zeros(
+            memory.size(0), dtype=torch.long, device=memory.device)
+        not_finished = torch.ones(
+            memory.size(0), dtype=torch.bool, device=memory.device)
+
+        self.initialize_inference_buffers(memory)
+        self.prenet.seed(seeds, self.max_decoder_steps, memory.device)
+
+        steps = 0
+        while True:
+            decoder_input = self.prenet(decoder_input)
+            mel_output, gate_output = self.decode_into(decoder_input, steps)
+            steps += 1
+
+            # Items keep decoding after their gate fired, their extra frames are cut off by mel_lengths
+            mel_lengths += not_finished.long()
+            not_finished &= torch.sigmoid(
+                gate_output.data.squeeze(1)) <= self.gate_threshold
+
+            if not not_finished.any():
                 break
-            elif len(mel_outputs) == self.max_decoder_steps:
+            elif steps == self.max_decoder_steps:
                 print("Warning! Reached max decoder steps")
                 break
 
             decoder_input = mel_output
 
-        mel_outputs, gate_outputs, alignments = self.parse_decoder_outputs(
-            mel_outputs, gate_outputs, alignments)
+        mel_outputs, gate_outputs, alignments = self.parse_decoder_buffers(
+            0, steps)
 
-        return mel_outputs, gate_outputs, alignments
+        return mel_outputs, gate_outputs, alignments, \
+            mel_lengths * self.n_frames_per_step
 
 
 class Tacotron2(nn.Module):
@@ -470,6 +792,17 @@ class Tacotron2(nn.Module):
         self.decoder = Decoder(hparams)
         self.postnet = Postnet(hparams)
 
+    def fold_batchnorm(self):
+        """ Folds every BatchNorm1d of the Encoder and Postnet into the ConvNorm
+        before it, the BatchNorm is replaced by an Identity (eval mode only)
+        """
+        for convolutions in (self.encoder.convolutions, self.postnet.convolutions):
+            for conv_layer in convolutions:
+                if isinstance(conv_layer[1], nn.BatchNorm1d):
+                    conv_layer[0].conv = fuse_conv_bn_eval(
+                        conv_layer[0].conv, conv_layer[1])
+                    conv_layer[1] = nn.Identity()
+
     def parse_batch(self, batch):
         text_padded, input_lengths, mel_padded, gate_padded, \
             output_lengths = batch
@@ -514,11 +847,11 @@ class Tacotron2(nn.Module):
             [mel_outputs, mel_outputs_postnet, gate_outputs, alignments],
             output_lengths)
 
-    def inference(self, inputs):
+    def inference(self, inputs, seeds=None):
         embedded_inputs = self.embedding(inputs).transpose(1, 2)
         encoder_outputs = self.encoder.inference(embedded_inputs)
         mel_outputs, gate_outputs, alignments = self.decoder.inference(
-            encoder_outputs)
+            encoder_outputs, seeds)
 
         mel_outputs_postnet = self.postnet(mel_outputs)
         mel_outputs_postnet = mel_outputs + mel_outputs_postnet
@@ -527,3 +860,49 @@ class Tacotron2(nn.Module):
             [mel_outputs, mel_outputs_postnet, gate_outputs, alignments])
 
         return outputs
+
+    def inference_batch(self, inputs, input_lengths, seeds=None):
+        """ Inference for a padded batch of sequences
+        PARAMS
+        ------
+        inputs: padded symbol ids (B, T_in)
+        input_lengths: symbols in each sequence
+        seeds: Prenet dropout seed per sequence, None for random dropout
+
+        RETURNS
+        -------
+        mel_outputs, mel_outputs_postnet, gate_outputs, alignments as in
+        inference, plus mel_lengths; frames past an item's length are zero
+        """
+        embedded_inputs = self.embedding(inputs).transpose(1, 2)
+        encoder_outputs = self.encoder.inference_batch(
+            embedded_inputs, input_lengths)
+        mel_outputs, gate_outputs, alignments, mel_lengths = \
+            self.decoder.inference_batch(encoder_outputs, input_lengths, seeds)
+
+        # Zero the frames past each item's end, so the postnet sees the same padding as for a single item
+        mask = ~get_mask_from_lengths(mel_lengths, mel_outputs.size(2))
+        mask = mask.unsqueeze(1)
+        mel_outputs = mel_outputs.masked_fill(mask, 0.0)
+
+        mel_outputs_postnet = self.postnet(mel_outputs)
+        mel_outputs_postnet = mel_outputs + mel_outputs_postnet
+        mel_outputs_postnet = mel_outputs_postnet.masked_fill(mask, 0.0)
+
+        return mel_outputs, mel_outputs_postnet, gate_outputs, alignments, \
+            mel_lengths
+
+    def inference_stream(self, inputs, block_steps=16, seeds=None):
+        """ Yields postnet mel frames while the decoder is still running """
+        embedded_inputs = self.embedding(inputs).transpose(1, 2)
+        encoder_outputs = self.encoder.inference(embedded_inputs)
+
+        postnet = StreamingPostnet(self.postnet)
+        for mel_outputs, _, _ in self.decoder.inference_stream(
+                encoder_outputs, block_steps, seeds):
+            mel_outputs_postnet = postnet.feed(mel_outputs)
+            if mel_outputs_postnet.size(2):
+                yield mel_outputs_postnet
+        mel_outputs_postnet = postnet.flush()
+        if mel_outputs_postnet.size(2):
+            yield mel_outputs_postnet
@@ -0,0 +1,153 @@
+from typing import Optional, Tuple
+import torch
+from torch import nn
+from torch.nn import functional as F
+
+
+# Bumped whenever forward's signature or graph changes, cached scripts of older versions are rebuilt
+SCRIPT_VERSION = 3
+
+
+class Tacotron2Inference(nn.Module):
+    """ Tacotron2 inference graph that can be compiled with torch.jit.script
+        - Runs Encoder.inference, the Decoder.inference loop and Postnet in
+          one scripted forward, without per-step Python dispatch
+        - Uses the fused location conv of Attention and preallocated outputs
+        - Shares its parameters with the eager model it was built from
+    """
+
+    def __init__(self, model):
+        super(Tacotron2Inference, self).__init__()
+        decoder = model.decoder
+        attention = decoder.attention_layer
+        assert decoder.n_frames_per_step == 1
+
+        self.embedding = model.embedding
+        self.encoder_convolutions = model.encoder.convolutions
+        self.encoder_lstm = model.encoder.lstm
+
+        self.prenet_layers = decoder.prenet.layers
+        self.attention_rnn = decoder.attention_rnn
+        self.query_layer = attention.query_layer
+        self.memory_layer = attention.memory_layer
+        self.v = attention.v
+        self.register_buffer(
+            'location_weight', attention.location_layer.fused_weight().detach())
+        self.decoder_rnn = decoder.decoder_rnn
+        self.linear_projection = decoder.linear_projection
+        self.gate_layer = decoder.gate_layer
+
+        self.postnet_convolutions = nn.ModuleList(
+            list(model.postnet.convolutions)[:-1])
+        self.postnet_last = model.postnet.convolutions[-1]
+
+        self.n_mel_channels = decoder.n_mel_channels
+        self.attention_rnn_dim = decoder.attention_rnn_dim
+        self.decoder_rnn_dim = decoder.decoder_rnn_dim
+        self.encoder_embedding_dim = decoder.encoder_embedding_dim
+
+    def forward(self, inputs: torch.Tensor, max_decoder_steps: int,
+                gate_threshold: float, prenet_masks: Optional[torch.Tensor] = None,
+                window: int = 0
+                ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """ Same outputs as Tacotron2.inference: mel_outputs,
+        mel_outputs_postnet, gate_outputs, alignments. prenet_masks are the
+        dropout masks of a seeded Prenet, random dropout is used without them.
+        window is Attention.window (0 for full attention)
+        """
+        # Encoder
+        x = self.embedding(inputs).transpose(1, 2)
+        for conv in self.encoder_convolutions:
+            x = F.relu(conv(x))
+        memory, _ = self.encoder_lstm(x.transpose(1, 2))
+
+        B = memory.size(0)
+        MAX_TIME = memory.size(1)
+        processed_memory = self.memory_layer(memory)
+        padding = (self.location_weight.size(2) - 1) // 2
+
+        # Decoder states and outputs
+        attention_hidden = memory.new_zeros(B, self.attention_rnn_dim)
+        attention_cell = memory.new_zeros(B, self.attention_rnn_dim)
+        decoder_hidden = memory.new_zeros(B, self.decoder_rnn_dim)
+        decoder_cell = memory.new_zeros(B, self.decoder_rnn_dim)
+        attention_weights_cat = memory.new_zeros(B, 2, MAX_TIME)
+        attention_context = memory.new_zeros(B, self.encoder_embedding_dim)
+
+        mel_buffer = memory.new_zeros(max_decoder_steps, B, self.n_mel_channels)
+        gate_buffer = memory.new_zeros(max_decoder_steps, B, 1)
+        alignment_buffer = memory.new_zeros(max_decoder_steps, B, MAX_TIME)
+
+        decoder_input = memory.new_zeros(B, self.n_mel_channels)
+        steps = 0
+        while steps < max_decoder_steps:
+            layer = 0
+            for linear in self.prenet_layers:
+                decoder_input = F.relu(linear(decoder_input))
+                if prenet_masks is None:
+                    decoder_input = F.dropout(decoder_input, p=0.5, training=True)
+                else:
+                    decoder_input = decoder_input * \
+                        prenet_masks[:, layer, steps, :decoder_input.size(1)]
+                layer += 1
+
+            attention_hidden, attention_cell = self.attention_rnn(
+                torch.cat((decoder_input, attention_context), -1),
+                (attention_hidden, attention_cell))
+
+            # Same windowing as Attention.inference_forward
+            lo, hi = 0, MAX_TIME
+            if window > 0:
+                peak = attention_weights_cat[:, 0].argmax(dim=1)
+                lo = max(0, int(peak.min()) - window)
+                hi = min(MAX_TIME, int(peak.max()) + window + 1)
+            clo, chi = max(0, lo - padding), min(MAX_TIME, hi + padding)
+
+            processed_query = self.query_layer(attention_hidden.unsqueeze(1))
+            processed_attention_weights = F.conv1d(
+                attention_weights_cat[:, :, clo:chi], self.location_weight,
+                padding=padding)[:, :, lo - clo:hi - clo].transpose(1, 2)
+            energies = self.v(torch.tanh(
+                processed_query + processed_attention_weights +
+                processed_memory[:, lo:hi])).squeeze(-1)
+            window_weights = F.softmax(energies, dim=1)
+            attention_context = torch.bmm(
+                window_weights.unsqueeze(1), memory[:, lo:hi]).squeeze(1)
+            attention_weights = memory.new_zeros(B, MAX_TIME)
+            attention_weights[:, lo:hi] = window_weights
+
+            # Previous weights and cumulative weights for the next step
+            attention_weights_cat[:, 0] = attention_weights
+            attention_weights_cat[:, 1] += attention_weights
+
+            decoder_hidden, decoder_cell = self.decoder_rnn(
+                torch.cat((attention_hidden, attention_context), -1),
+                (decoder_hidden, decoder_cell))
+            decoder_hidden_attention_context = torch.cat(
+                (decoder_hidden, attention_context), 1)
+
+            mel_output = self.linear_projection(decoder_hidden_attention_context)
+            gate_output = self.gate_layer(decoder_hidden_attention_context)
+            mel_buffer[steps] = mel_output
+            gate_buffer[steps] = gate_output
+            alignment_buffer[steps] = attention_weights
+            steps += 1
+
+            if bool((torch.sigmoid(gate_output) > gate_threshold).all()):
+                break
+            if steps == max_decoder_steps:
+                print("Warning! Reached max decoder steps")
+
+            decoder_input = mel_output
+
+        mel_outputs = mel_buffer[:steps].permute(1, 2, 0).contiguous()
+
+        # Postnet
+        x = mel_outputs
+        for conv in self.postnet_convolutions:
+            x = torch.tanh(conv(x))
+        mel_outputs_postnet = mel_outputs + self.postnet_last(x)
+
+        return mel_outputs, mel_outputs_postnet, \
+            gate_buffer[:steps].transpose(0, 1), \
+            alignment_buffer[:steps].transpose(0, 1)
@@ -1,5 +1,7 @@
 """ from https://github.com/keithito/tacotron """
 import re
+from functools import lru_cache
+import numpy as np
 from . import cleaners
 from .symbols import symbols
 
@@ -11,6 +13,11 @@ _id_to_symbol = {i: s for i, s in enumerate(symbols)}
 # Regular expression matching text enclosed in curly braces:
 _curly_re = re.compile(r'(.*?)\{(.+?)\}(.*)')
 
+# Translation table from every ASCII character to the character whose code is its symbol ID,
+# dropping characters without a symbol (all IDs fit in one byte):
+_ascii_to_id = {c: chr(_symbol_to_id[chr(c)]) if chr(c) in _symbol_to_id and chr(c) not in '_~' else None
+                for c in range(128)}
+
 
 def text_to_sequence(text, cleaner_names):
   '''Converts a string of text to a sequence of IDs corresponding to the symbols in the text.
@@ -40,6 +47,57 @@ def text_to_sequence(text, cleaner_names):
   return sequence
 
 
+def text_to_array(text, cleaner_names, dictionary=None):
+  '''Same IDs as text_to_sequence, as a read-only int64 numpy array.
+
+    Results are memoized per text and cleaner names, so repeated sentences skip
+    cleaning and symbol lookup altogether. The returned array is shared between
+    callers and must not be modified.
+
+    With a dictionary (a cmudict.CMUDictIndex), the words it knows are spelled
+    as ARPAbet after cleaning. Text that already has curly braces is left alone.
+  '''
+  return _text_to_array(text, tuple(cleaner_names), dictionary)
+
+
+@lru_cache(maxsize=1024)
+def _text_to_array(text, cleaner_names, dictionary=None):
+  if '{' not in text and dictionary is not None:
+    return _text_to_array(dictionary.to_arpabet(_clean_text(text, cleaner_names)), ())
+  if '{' not in text:
+    return _cleaned_to_array(_clean_text(text, cleaner_names))
+
+  parts = []
+  while len(text):
+    m = _curly_re.match(text)
+    if not m:
+      parts.append(_cleaned_to_array(_clean_text(text, cleaner_names)))
+      break
+    parts.append(_cleaned_to_array(_clean_text(m.group(1), cleaner_names)))
+    parts.append(_symbols_to_sequence(['@' + s for s in m.group(2).split()]))
+    text = m.group(3)
+
+  # Fill one preallocated array instead of concatenating the parts
+  array = np.empty(sum(len(part) for part in parts), dtype=np.int64)
+  offset = 0
+  for part in parts:
+    array[offset:offset + len(part)] = part
+    offset += len(part)
+  array.flags.writeable = False
+  return array
+
+
+@lru_cache(maxsize=1024)
+def _cleaned_to_array(text):
+  if text.isascii():
+    # One C-level pass over the text maps every character to its ID byte
+    ids = np.frombuffer(text.translate(_ascii_to_id).encode('latin-1'), dtype=np.uint8).astype(np.int64)
+  else:
+    ids = np.array(_symbols_to_sequence(text), dtype=np.int64)
+  ids.flags.writeable = False
+  return ids
+
+
 def sequence_to_text(sequence):
   '''Converts a sequence of IDs back to a string'''
   result = ''
@@ -71,4 +129,4 @@ def _arpabet_to_sequence(text):
 
 
 def _should_keep_symbol(s):
-  return s in _symbol_to_id and s is not '_' and s is not '~'
+  return s in _symbol_to_id and s != '_' and s != '~'
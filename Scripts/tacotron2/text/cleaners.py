@@ -20,8 +20,8 @@ from .numbers import normalize_numbers
 # Regular expression matching whitespace:
 _whitespace_re = re.compile(r'\s+')
 
-# List of (regular expression, replacement) pairs for abbreviations:
-_abbreviations = [(re.compile('\\b%s\\.' % x[0], re.IGNORECASE), x[1]) for x in [
+# Abbreviations and their expansions:
+_abbreviations = dict([
   ('mrs', 'misess'),
   ('mr', 'mister'),
   ('dr', 'doctor'),
@@ -40,13 +40,19 @@ _abbreviations = [(re.compile('\\b%s\\.' % x[0], re.IGNORECASE), x[1]) for x in
   ('ltd', 'limited'),
   ('col', 'colonel'),
   ('ft', 'fort'),
-]]
+])
+
+# One alternation over all abbreviations, longest first, so the text is scanned once:
+_abbreviations_re = re.compile(
+  r'\b(%s)\.' % '|'.join(sorted(_abbreviations, key=len, reverse=True)), re.IGNORECASE)
+
+
+def _expand_abbreviation(m):
+  return _abbreviations[m.group(1).lower()]
 
 
 def expand_abbreviations(text):
-  for regex, replacement in _abbreviations:
-    text = re.sub(regex, replacement, text)
-  return text
+  return _abbreviations_re.sub(_expand_abbreviation, text)
 
 
 def expand_numbers(text):
@@ -58,11 +64,12 @@ def lowercase(text):
 
 
 def collapse_whitespace(text):
-  return re.sub(_whitespace_re, ' ', text)
+  return _whitespace_re.sub(' ', text)
 
 
 def convert_to_ascii(text):
-  return unidecode(text)
+  # unidecode walks the text character by character, plain ASCII needs no transliteration
+  return text if text.isascii() else unidecode(text)
 
 
 def basic_cleaners(text):
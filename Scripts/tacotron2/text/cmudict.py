@@ -1,6 +1,9 @@
 """ from https://github.com/keithito/tacotron """
 
+import mmap
+import os
 import re
+import numpy as np
 
 
 valid_symbols = [
@@ -63,3 +66,107 @@ def _get_pronunciation(s):
     if part not in _valid_symbol_set:
       return None
   return ' '.join(parts)
+
+
+# Binary pronunciation index, see build_index:
+_index_magic = b'CMUIDX01'
+_index_header = 8 + 3 * 4 + 4
+
+# Words of cleaned (lowercase) text, with inner apostrophes:
+_word_re = re.compile(r"[a-z]+(?:'[a-z]+)*")
+
+
+def build_index(file_or_path, index_path):
+  '''Writes a compact binary index of a CMUDict file, keeping the first pronunciation of every word.
+
+    Layout: magic, word count, key bytes, phoneme count and 4 padding bytes, followed by uint32 key
+    offsets (count + 1), uint32 phoneme offsets (count + 1), the sorted upper case words as bytes, and
+    every pronunciation as uint8 indices into valid_symbols.
+  '''
+  if isinstance(file_or_path, str):
+    with open(file_or_path, encoding='latin-1') as f:
+      entries = _parse_cmudict(f)
+  else:
+    entries = _parse_cmudict(file_or_path)
+
+  words = sorted(word.encode('latin-1') for word in entries)
+  symbol_ids = {s: i for i, s in enumerate(valid_symbols)}
+  phonemes = [[symbol_ids[s] for s in entries[word.decode('latin-1')][0].split(' ')] for word in words]
+
+  key_offsets = np.zeros(len(words) + 1, dtype=np.uint32)
+  key_offsets[1:] = np.cumsum([len(word) for word in words])
+  phoneme_offsets = np.zeros(len(words) + 1, dtype=np.uint32)
+  phoneme_offsets[1:] = np.cumsum([len(p) for p in phonemes])
+
+  # Write to a temporary name first, a crash never leaves a truncated index behind
+  with open(index_path + '.tmp', 'wb') as f:
+    f.write(_index_magic)
+    f.write(np.array([len(words), key_offsets[-1], phoneme_offsets[-1], 0], dtype=np.uint32).tobytes())
+    f.write(key_offsets.tobytes())
+    f.write(phoneme_offsets.tobytes())
+    f.write(b''.join(words))
+    f.write(np.fromiter((i for p in phonemes for i in p), dtype=np.uint8, count=int(phoneme_offsets[-1])).tobytes())
+  os.replace(index_path + '.tmp', index_path)
+
+
+class CMUDictIndex:
+  '''Read-only CMUDict lookups from an index written by build_index.
+
+    The index is memory-mapped, so opening it costs no parsing and only the pages touched by
+    lookups are read. Words are found by binary search over the sorted key table.
+  '''
+  def __init__(self, index_path):
+    with open(index_path, 'rb') as f:
+      self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if self._map[:len(_index_magic)] != _index_magic:
+      raise ValueError('Not a CMUDict index: %s' % index_path)
+
+    count, key_bytes, phoneme_count, _ = np.frombuffer(self._map, dtype=np.uint32, count=4, offset=len(_index_magic))
+    offset = _index_header
+    self._key_offsets = np.frombuffer(self._map, dtype=np.uint32, count=count + 1, offset=offset)
+    offset += (count + 1) * 4
+    self._phoneme_offsets = np.frombuffer(self._map, dtype=np.uint32, count=count + 1, offset=offset)
+    offset += (count + 1) * 4
+    self._keys_start = offset
+    self._phonemes = np.frombuffer(self._map, dtype=np.uint8, count=phoneme_count, offset=offset + key_bytes)
+    self._count = int(count)
+
+
+  def __len__(self):
+    return self._count
+
+
+  def _key(self, i):
+    start = self._keys_start
+    return self._map[start + self._key_offsets[i]:start + self._key_offsets[i + 1]]
+
+
+  def lookup(self, word):
+    '''Returns the first ARPAbet pronunciation of the given word, or None.'''
+    try:
+      key = word.upper().encode('latin-1')
+    except UnicodeEncodeError:
+      return None
+
+    lo, hi = 0, self._count
+    while lo < hi:
+      mid = (lo + hi) // 2
+      if self._key(mid) < key:
+        lo = mid + 1
+      else:
+        hi = mid
+    if lo == self._count or self._key(lo) != key:
+      return None
+
+    ids = self._phonemes[self._phoneme_offsets[lo]:self._phoneme_offsets[lo + 1]]
+    return ' '.join(valid_symbols[i] for i in ids)
+
+
+  def to_arpabet(self, text):
+    '''Replaces every known word of cleaned text with its pronunciation in curly braces.'''
+    return _word_re.sub(self._arpabet_word, text)
+
+
+  def _arpabet_word(self, m):
+    pronunciation = self.lookup(m.group(0))
+    return '{%s}' % pronunciation if pronunciation else m.group(0)
@@ -11,6 +11,7 @@ _pounds_re = re.compile(r'£([0-9\,]*[0-9]+)')
 _dollars_re = re.compile(r'\$([0-9\.\,]*[0-9]+)')
 _ordinal_re = re.compile(r'[0-9]+(st|nd|rd|th)')
 _number_re = re.compile(r'[0-9]+')
+_digit_re = re.compile(r'[0-9]')
 
 
 def _remove_commas(m):
@@ -62,10 +63,13 @@ def _expand_number(m):
 
 
 def normalize_numbers(text):
-  text = re.sub(_comma_number_re, _remove_commas, text)
-  text = re.sub(_pounds_re, r'\1 pounds', text)
-  text = re.sub(_dollars_re, _expand_dollars, text)
-  text = re.sub(_decimal_number_re, _expand_decimal_point, text)
-  text = re.sub(_ordinal_re, _expand_ordinal, text)
-  text = re.sub(_number_re, _expand_number, text)
+  # Every pattern below needs a digit, most sentences have none
+  if _digit_re.search(text) is None:
+    return text
+  text = _comma_number_re.sub(_remove_commas, text)
+  text = _pounds_re.sub(r'\1 pounds', text)
+  text = _dollars_re.sub(_expand_dollars, text)
+  text = _decimal_number_re.sub(_expand_decimal_point, text)
+  text = _ordinal_re.sub(_expand_ordinal, text)
+  text = _number_re.sub(_expand_number, text)
   return text
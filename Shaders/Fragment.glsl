@@ -88,7 +88,7 @@ void main()
 
         // Large scane line effect
         float ScanPosition = 1.0 - mod(Time / 5.0, 2.0);
-        float DistToScan = 1.0 - (ScreenUV.y - ScanPosition) * 4.0;
+        float DistToScan = 1.0 - ((1.0 - ScreenUV.y) - ScanPosition) * 4.0; // UVs are flipped, keep the scan moving down
         vec4 ScreenScan = (DistToScan > 0.0 && DistToScan < 1.0) ? CompressColor(LightColorDark, 0.5) * 0.075 * DistToScan : vec4(0.0);
 
         // Backlighting from screen
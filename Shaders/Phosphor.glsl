@@ -0,0 +1,26 @@
+#version 330 core
+
+uniform sampler2D CurrentFrame;  // Text drawn this frame
+uniform sampler2D PreviousFrame; // Output of this pass last frame
+uniform vec3 FadeColor;          // Text color, the fade is a fraction of it
+uniform float FadeFactor;        // Fraction of the text color that decays per reference frame
+uniform float FrameScale;        // Reference frames elapsed since the last frame
+
+// Base shader variables
+in vec2 FragCoord;
+out vec4 FragColor;
+
+void main()
+{
+    // Read the texel this fragment writes. FragCoord is flipped by the vertex shader, so flip it back
+    ivec2 Size = textureSize(CurrentFrame, 0);
+    ivec2 Pixel = ivec2(floor(FragCoord * vec2(Size)));
+    Pixel.y = Size.y - 1 - Pixel.y;
+
+    vec3 Current = texelFetch(CurrentFrame, Pixel, 0).rgb;
+    vec3 Previous = texelFetch(PreviousFrame, Pixel, 0).rgb;
+
+    // The afterglow loses a fixed amount per reference frame (at least one 8 bit step), new text is added on top
+    vec3 Fade = max(FadeColor * FadeFactor, vec3(1.0 / 255.0)) * FrameScale;
+    FragColor = vec4(max(Previous - Fade, Current), 1.0);
+}
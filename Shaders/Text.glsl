@@ -0,0 +1,54 @@
+#version 330 core
+
+uniform usampler2D GlyphGrid;  // One atlas index per text cell, row 0 is the top line
+uniform sampler2D GlyphAtlas;  // Pre-rendered glyph sheet, row 0 is the top of the sheet
+uniform ivec2 CellSize;        // Spacing of the text grid in pixels
+uniform ivec2 GlyphSize;       // Size of one atlas cell in pixels
+uniform int AtlasColumns;
+
+// Base shader variables
+in vec2 FragCoord;
+out vec4 FragColor;
+
+vec4 SampleGlyph(ivec2 Cell, ivec2 Pixel)
+{
+    // Outside the grid or outside this cell's glyph
+    ivec2 Local = Pixel - Cell * CellSize;
+    if (any(lessThan(Cell, ivec2(0))) || any(greaterThanEqual(Cell, textureSize(GlyphGrid, 0))) ||
+        any(greaterThanEqual(Local, GlyphSize)))
+        return vec4(0.0);
+
+    // Index 0 is the blank space glyph
+    int Index = int(texelFetch(GlyphGrid, Cell, 0).r);
+    if (Index == 0)
+        return vec4(0.0);
+
+    ivec2 AtlasCell = ivec2(Index % AtlasColumns, Index / AtlasColumns);
+    return texelFetch(GlyphAtlas, AtlasCell * GlyphSize + Local, 0);
+}
+
+void main()
+{
+    // Pixel position with the origin in the top left. FragCoord is already flipped by the vertex
+    // shader, so flip it back to write the top line at v = 0 like a pygame upload
+    ivec2 Resolution = textureSize(GlyphGrid, 0) * CellSize;
+    ivec2 Pixel = ivec2(floor(FragCoord * vec2(Resolution)));
+    Pixel.y = Resolution.y - 1 - Pixel.y;
+
+    ivec2 Cell = Pixel / CellSize;
+
+    // Glyphs larger than the grid spacing spill into the cells to their right and below
+    ivec2 Overflow = (GlyphSize - 1) / CellSize;
+
+    vec3 Color = vec3(0.0);
+    for (int y = 0; y <= Overflow.y; y++)
+    {
+        for (int x = 0; x <= Overflow.x; x++)
+        {
+            vec4 Glyph = SampleGlyph(Cell - ivec2(x, y), Pixel);
+            Color = max(Color, Glyph.rgb * Glyph.a); // Blend over the black screen
+        }
+    }
+
+    FragColor = vec4(Color, 1.0);
+}
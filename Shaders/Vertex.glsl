@@ -7,6 +7,7 @@ out vec2 FragCoord;
 
 void main()
 {
-    FragCoord = texcoord;
+    // Flip vertically so textures uploaded from pygame (top row first) appear upright
+    FragCoord = vec2(texcoord.x, 1.0 - texcoord.y);
     gl_Position = vec4(vert, 0.0, 1.0);
 }
@@ -0,0 +1,4 @@
+import os, sys
+
+# The tests import the Scripts package the way Main.py does, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,61 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from Scripts.tacotron2.hparams import create_hparams
+from Scripts.tacotron2.model import Tacotron2
+
+SEED = 1234
+
+@pytest.fixture
+def Model():
+    """Randomly initialised Tacotron2 in eval mode that always decodes exactly 40 frames."""
+    torch.manual_seed(SEED)
+    Model = Tacotron2(create_hparams()).eval()
+    Model.decoder.max_decoder_steps = 40
+    Model.decoder.gate_threshold = 1.0  # The gate sigmoid never exceeds 1, so no decode stops early
+    return Model
+
+@pytest.fixture
+def Inputs(Model):
+    """One random symbol id sequence (1, 30)."""
+    Generator = torch.Generator().manual_seed(SEED)
+    return torch.randint(1, Model.embedding.num_embeddings, (1, 30), generator=Generator)
+
+def test_fused_location_layer(Model, Inputs):
+    """The fused location conv gives the inference outputs of the separate location layer. It sums in a
+    different order, so only up to rounding."""
+    Attention = Model.decoder.attention_layer
+    Attention.location_weight, Attention.window = None, None
+    with torch.inference_mode():
+        Reference = Model.inference(Inputs, [SEED])
+        Attention.fuse_location_layer()
+        Fused = Model.inference(Inputs, [SEED])
+
+    assert max((A - B).abs().max().item() for A, B in zip(Reference, Fused)) < 1e-4
+
+@pytest.mark.parametrize("Window", [None, 4])
+def test_decode_into_matches_decode(Model, Inputs, Window):
+    """Decoder.inference (decode_into and its preallocated buffers) gives bit for bit what decode gives for
+    every step, under the same prenet masks.
+
+    decode is teacher forced with the mel frames of decode_into, so each step starts from the same input.
+    """
+    Decoder = Model.decoder
+    Decoder.attention_layer.fuse_location_layer()
+    Decoder.attention_layer.window = Window
+
+    with torch.inference_mode():
+        Memory = Model.encoder.inference(Model.embedding(Inputs).transpose(1, 2))
+        Mels, Gates, Alignments = Decoder.inference(Memory, [SEED])
+
+        DecoderInput = Decoder.get_go_frame(Memory)
+        Decoder.initialize_decoder_states(Memory, mask=None)
+        Decoder.prenet.seed([SEED], Decoder.max_decoder_steps, Memory.device)
+        for Step in range(Mels.size(2)):
+            Mel, Gate, Alignment = Decoder.decode(Decoder.prenet(DecoderInput))
+
+            assert torch.equal(Mel, Mels[:, :, Step])
+            assert torch.equal(Gate, Gates[:, Step])
+            assert torch.equal(Alignment, Alignments[:, Step])
+            DecoderInput = Mels[:, :, Step]